@@ -0,0 +1,245 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+import company_info
+import competitor_analysis
+import competitors
+import go_to_market
+import investors
+import path_to_mvp
+import poter_forces
+import target_market
+
+# Many niches x many analyzers in one request, streamed back as NDJSON.
+#   BATCH_CONCURRENCY   analyzer calls in flight across all batches, default 4
+#   BATCH_MAX_ITEMS     largest batch (niches x analyzers) accepted, default 5000
+#   BATCH_STORE_PATH    SQLite file recording finished items for resume, default .cache/batches.sqlite3
+#   BATCH_TTL           seconds a batch can be resumed, default 7 days
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "5000"))
+BATCH_STORE_PATH = os.getenv("BATCH_STORE_PATH", ".cache/batches.sqlite3")
+BATCH_TTL = float(os.getenv("BATCH_TTL", str(7 * 24 * 3600)))
+
+ANALYZERS = {
+    "mvp": path_to_mvp.aanalyze_mvp,
+    "porters_forces": poter_forces.aanalyze_market,
+    "target_market": target_market.aanalyze_market,
+    "investors": investors.aanalyze_investors,
+    "competitor_analysis": competitor_analysis.aanalyze_competitors,
+    "competitors": competitors.aanalyze_competitors,
+    "go_to_market": go_to_market.agenerate_go_to_market_strategy,
+    "startup_info": company_info.aget_startup_info,
+}
+
+router = APIRouter()
+
+
+class BatchStore:
+    """Batch specs and their finished items, kept so a batch can be resumed.
+
+    Nothing is evicted to make room: a batch and its items are dropped only
+    once it is older than the TTL, swept whenever a new batch is created.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS batches (batch_id TEXT PRIMARY KEY, spec TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS batches_created ON batches (created)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                "batch_id TEXT NOT NULL, analyzer TEXT NOT NULL, niche TEXT NOT NULL, item TEXT NOT NULL, "
+                "PRIMARY KEY (batch_id, analyzer, niche))"
+            )
+        return self._db
+
+    def create(self, batch_id, spec):
+        now = time.time()
+        with self._lock:
+            db = self._connection()
+            expired = now - self.ttl
+            db.execute("DELETE FROM items WHERE batch_id IN (SELECT batch_id FROM batches WHERE created < ?)", (expired,))
+            db.execute("DELETE FROM batches WHERE created < ?", (expired,))
+            db.execute("INSERT INTO batches (batch_id, spec, created) VALUES (?, ?, ?)", (batch_id, json.dumps(spec), now))
+            db.commit()
+
+    def spec(self, batch_id):
+        """The batch's spec, or None if it is unknown or has expired."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT spec FROM batches WHERE batch_id = ? AND created >= ?", (batch_id, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def finished(self, batch_id):
+        """Items recorded for the batch, by (analyzer, niche)."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT analyzer, niche, item FROM items WHERE batch_id = ?", (batch_id,)
+            ).fetchall()
+        return {(analyzer, niche): json.loads(item) for analyzer, niche, item in rows}
+
+    def record(self, batch_id, item):
+        with self._lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO items (batch_id, analyzer, niche, item) VALUES (?, ?, ?, ?)",
+                (batch_id, item["analyzer"], item["niche"], json.dumps(jsonable_encoder(item))),
+            )
+            db.commit()
+
+
+store = BatchStore(BATCH_STORE_PATH, BATCH_TTL)
+
+# Shared by every batch so that concurrent batches together stay within the
+# Gemini quota instead of each getting BATCH_CONCURRENCY calls of their own.
+_slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+
+class BatchRequest(BaseModel):
+    niches: List[str]
+    analyzers: List[str] = list(ANALYZERS)
+
+
+def _error_detail(e):
+    if isinstance(e, HTTPException):
+        return e.detail
+    return str(e) or type(e).__name__
+
+
+def _items(spec):
+    return [(niche, analyzer) for niche in spec["niches"] for analyzer in spec["analyzers"]]
+
+
+def _line(data):
+    return json.dumps(jsonable_encoder(data)) + "\n"
+
+
+def _public(item, base_url):
+    """The item as sent to the client, with competitor logo URLs made absolute."""
+    if item["analyzer"] == "competitors" and item["status"] == "ok":
+        return {**item, "result": competitors.with_logo_urls(item["result"], base_url)}
+    return item
+
+
+async def _load(batch_id):
+    spec = await asyncio.to_thread(store.spec, batch_id)
+    if spec is None:
+        raise HTTPException(status_code=404, detail="Unknown batch")
+    return spec
+
+
+async def _run_item(batch_id, niche, analyzer):
+    async with _slots:
+        start = time.perf_counter()
+        try:
+            result = await ANALYZERS[analyzer](niche)
+            outcome = {"status": "ok", "result": result}
+        except Exception as e:
+            outcome = {"status": "error", "error": _error_detail(e)}
+    item = {"batch_id": batch_id, "niche": niche, "analyzer": analyzer, **outcome,
+            "seconds": round(time.perf_counter() - start, 3)}
+    # Only successes count as done; failed items run again on resume.
+    if item["status"] == "ok":
+        await asyncio.to_thread(store.record, batch_id, item)
+    return item
+
+
+async def _stream(batch_id, spec, replay, base_url):
+    pending, done = [], []
+    finished = await asyncio.to_thread(store.finished, batch_id)
+    for niche, analyzer in _items(spec):
+        item = finished.get((analyzer, niche))
+        if item is not None:
+            done.append(item)
+        else:
+            pending.append((niche, analyzer))
+
+    yield _line({"batch_id": batch_id, "total": len(done) + len(pending), "completed": len(done),
+                 "pending": len(pending)})
+    if replay:
+        for item in done:
+            yield _line({**_public(item, base_url), "resumed": True})
+
+    # Tasks keep running if the client disconnects, so a later resume finds
+    # their results in the store instead of paying for them again.
+    tasks = [asyncio.create_task(_run_item(batch_id, niche, analyzer)) for niche, analyzer in pending]
+    failed = 0
+    for next_item in asyncio.as_completed(tasks):
+        item = await next_item
+        failed += item["status"] != "ok"
+        yield _line(_public(item, base_url))
+
+    yield _line({"batch_id": batch_id, "done": True, "completed": len(done) + len(pending) - failed,
+                 "failed": failed})
+
+
+def _ndjson(batch_id, spec, replay, base_url):
+    return StreamingResponse(
+        _stream(batch_id, spec, replay, base_url),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Batch-Id": batch_id},
+    )
+
+
+@router.post("/batch")
+async def submit_batch(request: BatchRequest, http_request: Request):
+    """Run every analyzer over every niche, streaming one JSON line per finished item.
+
+    The first line carries the batch_id; POST /batch/{batch_id}/resume picks a
+    broken-off batch up again, running only the items that have not succeeded.
+    """
+    niches = list(dict.fromkeys(n.strip() for n in request.niches if n.strip()))
+    analyzers = list(dict.fromkeys(request.analyzers))
+    unknown = [a for a in analyzers if a not in ANALYZERS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown analyzers: {', '.join(unknown)}")
+    if not niches or not analyzers:
+        raise HTTPException(status_code=400, detail="A batch needs at least one niche and one analyzer")
+    if len(niches) * len(analyzers) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch larger than {BATCH_MAX_ITEMS} items")
+
+    batch_id = uuid.uuid4().hex
+    spec = {"niches": niches, "analyzers": analyzers, "created": time.time()}
+    await asyncio.to_thread(store.create, batch_id, spec)
+    return _ndjson(batch_id, spec, False, http_request.base_url)
+
+
+@router.post("/batch/{batch_id}/resume")
+async def resume_batch(batch_id: str, request: Request, replay: bool = False):
+    """Continue a batch; with replay=true, finished items are streamed again first."""
+    return _ndjson(batch_id, await _load(batch_id), replay, request.base_url)
+
+
+@router.get("/batch/{batch_id}")
+async def get_batch(batch_id: str):
+    spec = await _load(batch_id)
+    finished = await asyncio.to_thread(store.finished, batch_id)
+    pending = [
+        {"niche": niche, "analyzer": analyzer}
+        for niche, analyzer in _items(spec)
+        if (analyzer, niche) not in finished
+    ]
+    total = len(spec["niches"]) * len(spec["analyzers"])
+    return {"batch_id": batch_id, **spec, "total": total, "completed": total - len(pending), "pending": pending}
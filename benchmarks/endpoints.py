@@ -0,0 +1,193 @@
+"""Throughput and latency of every route in app.py against a fake Gemini.
+
+Requests go through the full ASGI stack in-process (middleware, routing,
+coalescing, rate limiter, parsing), with the model, logo search and Chrome
+replaced by the local fakes in fakes.py. Every request uses a fresh niche so
+the response cache and request coalescing do not hide the work.
+
+    python benchmarks/endpoints.py [--concurrency 1 8 32] [--requests 64] [--latency 0.05] [--route /analyze_mvp]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import sys
+import time
+
+from fakes import configure_environment, install
+
+configure_environment()
+
+import httpx  # noqa: E402
+
+import app  # noqa: E402
+
+_niches = itertools.count()
+
+
+def _niche():
+    return f"benchmark niche {next(_niches)}"
+
+
+def _post(path):
+    return lambda: ("POST", path, {"params": {"market_niche": _niche()}})
+
+
+def _get(path, **params):
+    return lambda: ("GET", path, {"params": params})
+
+
+def _stream(path):
+    return lambda: ("GET", path, {"params": {"market_niche": _niche()}})
+
+
+# route -> factory returning (method, url, httpx request kwargs) for one request.
+ROUTES = {
+    ("POST", "/generate_go_to_market_strategy"): _post("/generate_go_to_market_strategy"),
+    ("GET", "/generate_go_to_market_strategy/stream"): _stream("/generate_go_to_market_strategy/stream"),
+    ("POST", "/analyze_mvp"): _post("/analyze_mvp"),
+    ("GET", "/analyze_mvp/stream"): _stream("/analyze_mvp/stream"),
+    ("POST", "/analyze_market"): _post("/analyze_market"),
+    ("GET", "/analyze_market/stream"): _stream("/analyze_market/stream"),
+    ("POST", "/analyze_investors"): _post("/analyze_investors"),
+    ("POST", "/analyze_target_market"): _post("/analyze_target_market"),
+    ("POST", "/analyze_competitors"): _post("/analyze_competitors"),
+    ("POST", "/get_competitors"): _post("/get_competitors"),
+    ("POST", "/generate_graph"): _post("/generate_graph"),
+    ("POST", "/get_startup_info"): _post("/get_startup_info"),
+    ("POST", "/analyze_all"): _post("/analyze_all"),
+    ("POST", "/generate_pdf"): _post("/generate_pdf"),
+    ("POST", "/pdf_jobs"): _post("/pdf_jobs"),
+    ("POST", "/batch"): lambda: (
+        "POST", "/batch", {"json": {"niches": [_niche(), _niche()], "analyzers": ["mvp", "porters_forces"]}}
+    ),
+    ("GET", "/metrics"): _get("/metrics"),
+    ("GET", "/cache/stats"): _get("/cache/stats"),
+    ("GET", "/parse/stats"): _get("/parse/stats"),
+    ("GET", "/pdf_browsers/stats"): _get("/pdf_browsers/stats"),
+    ("GET", "/coalescing/stats"): _get("/coalescing/stats"),
+    ("GET", "/rate_limit/stats"): _get("/rate_limit/stats"),
+    ("GET", "/cassette/stats"): _get("/cassette/stats"),
+    ("GET", "/knowledge"): _get("/knowledge", market_niche="benchmark niche 0"),
+    ("GET", "/knowledge/stats"): _get("/knowledge/stats"),
+    ("GET", "/niches/match"): _get("/niches/match", market_niche="Benchmark Niche 0 startups"),
+    ("GET", "/niches/stats"): _get("/niches/stats"),
+    ("GET", "/prompts/stats"): _get("/prompts/stats"),
+    ("GET", "/debug/llm_failures"): _get("/debug/llm_failures"),
+    ("GET", "/logos/{digest}"): _get(f"/logos/{'0' * 64}"),
+}
+
+
+
+async def _stateful_routes(client):
+    """Routes addressing a PDF job or batch, pointed at one created up front."""
+    job = (await client.post("/pdf_jobs", params={"market_niche": _niche()})).json()["job_id"]
+    await client.get(f"/pdf_jobs/{job}/pdf", params={"wait": True})
+    response = await client.post("/batch", json={"niches": [_niche()], "analyzers": ["mvp"]})
+    batch = json.loads(response.text.splitlines()[0])["batch_id"]
+    return {
+        ("GET", "/pdf_jobs/{job_id}"): _get(f"/pdf_jobs/{job}"),
+        ("GET", "/pdf_jobs/{job_id}/pdf"): _get(f"/pdf_jobs/{job}/pdf"),
+        ("GET", "/batch/{batch_id}"): _get(f"/batch/{batch}"),
+        ("POST", "/batch/{batch_id}/resume"): lambda: ("POST", f"/batch/{batch}/resume", {"params": {"replay": True}}),
+    }
+
+
+def app_routes():
+    routes = set()
+    for path, operations in app.app.openapi()["paths"].items():
+        routes.update((method.upper(), path) for method in operations)
+    return routes
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def _one(client, factory, latencies, errors):
+    method, url, kwargs = factory()
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        # Read the whole body so streamed routes are timed to their last event.
+        await response.aread()
+        if response.status_code >= 500:
+            errors.append(response.status_code)
+    except Exception as e:
+        errors.append(type(e).__name__)
+    latencies.append(time.perf_counter() - start)
+
+
+async def measure(client, route, factory, concurrency, requests):
+    latencies, errors = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded():
+        async with semaphore:
+            await _one(client, factory, latencies, errors)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    ordered = sorted(latencies)
+    return {
+        "method": route[0],
+        "route": route[1],
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(errors),
+        "throughput_rps": round(requests / elapsed, 2),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+    }
+
+
+async def run(concurrency_levels, requests, latency, only=None):
+    llm = install(latency=latency)
+    transport = httpx.ASGITransport(app=app.app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        routes = {**ROUTES, **await _stateful_routes(client)}
+        for route, factory in routes.items():
+            if only and route[1] not in only:
+                continue
+            for concurrency in concurrency_levels:
+                results.append(await measure(client, route, factory, concurrency, max(requests, concurrency)))
+                print(json.dumps(results[-1]), file=sys.stderr)
+    uncovered = sorted(app_routes() - set(routes))
+    return {
+        "benchmark": "endpoints",
+        "fake_llm_latency_s": latency,
+        "llm_calls": llm.calls,
+        "results": results,
+        "uncovered_routes": [f"{method} {path}" for method, path in uncovered],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=64, help="requests per route and concurrency level")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the fake model takes per call")
+    parser.add_argument("--route", action="append", help="only benchmark this path (repeatable)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args.concurrency, args.requests, args.latency, args.route))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
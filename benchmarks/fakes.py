@@ -0,0 +1,198 @@
+"""Deterministic local stand-ins for Gemini and headless Chrome.
+
+install() swaps them into the running service so every code path can be
+exercised and timed without network access or API quota.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import typing
+from typing import Any, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import BaseModel
+
+import prompts
+
+# A minimal valid one-page PDF, returned by the fake browser.
+_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+_WORDS = "market growth customer revenue product channel pricing segment strategy risk".split()
+
+
+def _text(seed, words):
+    digest = hashlib.sha256(seed.encode("utf-8")).digest()
+    return " ".join(_WORDS[b % len(_WORDS)] for b in digest[:words]).capitalize() + "."
+
+
+def sample(annotation, seed="", words=12, items=3):
+    """Deterministic example data for a pydantic model or field annotation."""
+    origin = typing.get_origin(annotation)
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if origin in (list, tuple, set):
+        return [sample(args[0] if args else str, f"{seed}[{i}]", words, items) for i in range(items)]
+    if origin is typing.Union:
+        return sample(args[0], seed, words, items)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {
+            name: sample(field.annotation, f"{seed}.{name}", words, items)
+            for name, field in annotation.model_fields.items()
+        }
+    if annotation is int:
+        return int(hashlib.sha256(seed.encode("utf-8")).hexdigest()[:6], 16)
+    if annotation is float:
+        return float(int(hashlib.sha256(seed.encode("utf-8")).hexdigest()[:6], 16)) / 100
+    if annotation is bool:
+        return True
+    return _text(seed, words)
+
+
+def _fingerprint(prompt):
+    """The longest literal stretch of a prompt's rendered text, used to recognise it."""
+    compiled = prompt()
+    marker = "\x00"
+    text = prompt.template.format(
+        **compiled.partial_variables, **{name: marker for name in prompt.input_variables}
+    )
+    return max((chunk.strip() for chunk in text.split(marker)), key=len)
+
+
+class FakeChatModel(BaseChatModel):
+    """Answers each registered prompt with valid JSON for its schema after a fixed delay."""
+
+    latency: float = 0.05
+    chunk_chars: int = 64
+    words: int = 12
+    calls: int = 0
+    model: str = "fake-gemini"
+    fingerprints: Optional[List[Any]] = None
+
+    @property
+    def _llm_type(self):
+        return "fake-gemini"
+
+    def _prompt_for(self, text):
+        if self.fingerprints is None:
+            self.fingerprints = sorted(
+                ((_fingerprint(p), p) for p in prompts._registry.values()), key=lambda fp: -len(fp[0])
+            )
+        for fingerprint, prompt in self.fingerprints:
+            if fingerprint in text:
+                return prompt
+        return None
+
+    def respond(self, text):
+        prompt = self._prompt_for(text)
+        if prompt is None:
+            return "```json\n{}\n```"
+        if prompt.name == "report_html":
+            return "```html\n<!DOCTYPE html><html><body><h1>Report</h1></body></html>\n```"
+        data = sample(prompt.model, seed=text[-200:], words=self.words)
+        return "```json\n" + json.dumps(data) + "\n```"
+
+    def _text(self, messages):
+        self.calls += 1
+        return "\n".join(str(m.content) for m in messages)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        content = self.respond(self._text(messages))
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        content = self.respond(self._text(messages))
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        content = self.respond(self._text(messages))
+        pieces = [content[i:i + self.chunk_chars] for i in range(0, len(content), self.chunk_chars)]
+        for piece in pieces:
+            await asyncio.sleep(self.latency / len(pieces))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+
+class FakeChromeDriver:
+    """Just enough of selenium's Chrome driver for pdf_renderer."""
+
+    def __init__(self, latency=0.02):
+        self.latency = latency
+
+    def get(self, url):
+        pass
+
+    def execute_script(self, script):
+        return "complete"
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Page.getFrameTree":
+            return {"frameTree": {"frame": {"id": "fake"}}}
+        if command == "Page.printToPDF":
+            time.sleep(self.latency)
+            return {"data": base64.b64encode(_PDF).decode("ascii")}
+        return {}
+
+    def quit(self):
+        pass
+
+
+def configure_environment():
+    """Settings for measuring the service itself; call before importing the app."""
+    defaults = {
+        "RESPONSE_CACHE_ENABLED": "0",
+        "GEMINI_REQUESTS_PER_MINUTE": "100000000",
+        "GEMINI_INITIAL_CONCURRENCY": "256",
+        "GEMINI_MAX_CONCURRENCY": "256",
+        "LOGO_PROXY_ENABLED": "0",
+        "PDF_RENDER_SETTLE": "0",
+        "RAW_RESPONSE_SAMPLE_RATE": "0",
+        "LOG_LEVEL": "WARNING",
+    }
+    # Fresh stores per run, so leftovers from an earlier run are never measured.
+    scratch = tempfile.mkdtemp(prefix="benchmark-")
+    for name, path in {
+        "RESPONSE_CACHE_PATH": "responses.sqlite3",
+        "BATCH_STORE_PATH": "batches.sqlite3",
+        "LOGO_CACHE_PATH": "logos.sqlite3",
+        "KNOWLEDGE_PATH": "knowledge.sqlite3",
+        "NICHE_INDEX_PATH": "niches.sqlite3",
+        "LOGO_STORE_DIR": "logos",
+        "PDF_JOB_DIR": "pdf_jobs",
+    }.items():
+        defaults[name] = os.path.join(scratch, path)
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+
+def install(latency=0.05, pdf_latency=0.02):
+    """Route every Gemini call, logo lookup and PDF render to the local fakes."""
+    import llm_provider
+    import logo_lookup
+    import pdf_renderer
+
+    llm = FakeChatModel(latency=latency)
+    llm_provider.set_llm(llm)
+    logo_lookup.set_backend(lambda name: f"https://logos.example/{name.lower().replace(' ', '-')}.png")
+    pdf_renderer.pool.close()
+    pdf_renderer.pool = pdf_renderer.BrowserPool(
+        pdf_renderer.PDF_BROWSER_POOL_SIZE,
+        pdf_renderer.PDF_BROWSER_MAX_RENDERS,
+        launch=lambda: FakeChromeDriver(pdf_latency),
+    )
+    return llm
@@ -0,0 +1,261 @@
+"""A local stand-in for the Gemini REST API, for load tests.
+
+Speaks enough of generateContent and streamGenerateContent for the real
+langchain_google_genai client (REST transport) to talk to it. Answers come
+from the prompt-aware fake in fakes.py, after a latency drawn from a
+configurable distribution, and can be throttled or fail on purpose:
+
+    python benchmarks/gemini_server.py --port 8090 --latency lognormal --median 1.5 \
+        --tokens-per-second 80 --max-concurrency 16 --error-429 0.02 --error-500 0.01
+
+Point the service at it with
+
+    GEMINI_TRANSPORT=rest GEMINI_API_ENDPOINT=http://127.0.0.1:8090 GOOGLE_API_KEY=local
+
+GET /stats reports what the stand-in has served.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+
+from fakes import FakeChatModel, configure_environment
+
+configure_environment()
+
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import JSONResponse, StreamingResponse  # noqa: E402
+
+import app  # noqa: E402,F401  (registers every prompt the fake recognises)
+
+# google.ai.generativelanguage Candidate.FinishReason.STOP
+_FINISH_STOP = 1
+_ERRORS = {
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+}
+
+
+class Settings:
+    def __init__(self, args):
+        self.latency = args.latency
+        self.median = args.median
+        self.sigma = args.sigma
+        self.minimum = args.min_latency
+        self.tokens_per_second = args.tokens_per_second
+        self.chunk_tokens = args.chunk_tokens
+        self.error_429 = args.error_429
+        self.error_500 = args.error_500
+        self.max_concurrency = args.max_concurrency
+        self.requests_per_minute = args.requests_per_minute
+        self.unfenced = args.unfenced
+        self.prose = args.prose
+        self.seed = args.seed
+
+    def time_to_first_token(self, rng):
+        """Seconds before the first token, from the configured distribution."""
+        if self.latency == "fixed":
+            seconds = self.median
+        elif self.latency == "uniform":
+            seconds = rng.uniform(0, 2 * self.median)
+        elif self.latency == "exponential":
+            seconds = rng.expovariate(1 / self.median) if self.median else 0
+        else:
+            # Log-normal: most calls near the median, with the long tail real models show.
+            seconds = self.median * math.exp(rng.gauss(0, self.sigma))
+        return max(self.minimum, seconds)
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.output_tokens = 0
+        self._window = []
+
+    def incr(self, key, n=1):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + n
+
+    def enter(self, limit, per_minute):
+        """Admit a call, or return why it is rejected (over capacity or quota)."""
+        with self._lock:
+            now = time.monotonic()
+            if per_minute:
+                self._window = [t for t in self._window if now - t < 60]
+                if len(self._window) >= per_minute:
+                    return "quota"
+            if limit and self.in_flight >= limit:
+                return "capacity"
+            self._window.append(now)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return None
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": dict(self.counts),
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "output_tokens": self.output_tokens,
+            }
+
+
+def _error(status, message):
+    return JSONResponse({"error": {"code": status, "message": message, "status": _ERRORS[status]}}, status_code=status)
+
+
+def _tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _response(text, prompt_tokens, output_tokens, finished=True):
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finished:
+        candidate["finishReason"] = _FINISH_STOP
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        },
+    }
+
+
+def create_app(settings):
+    api = FastAPI()
+    stats = Stats()
+    fake = FakeChatModel()
+    rng = random.Random(settings.seed)
+
+    def answer(prompt):
+        content = fake.respond(prompt)
+        if content.startswith("```json") and rng.random() < settings.unfenced:
+            content = content[len("```json"):].rsplit("```", 1)[0].strip()
+        if rng.random() < settings.prose:
+            content = f"Sure! Here is the analysis you asked for.\n\n{content}\n\nLet me know if you need anything else."
+        return content
+
+    def prompt_text(body):
+        return "\n".join(
+            part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", [])
+        )
+
+    def rejection():
+        roll = rng.random()
+        if roll < settings.error_429:
+            return _error(429, "Resource has been exhausted (e.g. check quota).")
+        if roll < settings.error_429 + settings.error_500:
+            return _error(500, "An internal error has occurred.")
+        reason = stats.enter(settings.max_concurrency, settings.requests_per_minute)
+        if reason:
+            stats.incr(f"rejected_{reason}")
+            return _error(429, f"Resource has been exhausted ({reason}).")
+        return None
+
+    async def admitted(method):
+        stats.incr(method)
+        rejected = rejection()
+        if rejected is not None:
+            stats.incr(f"{method}_{rejected.status_code}")
+            return rejected
+        return None
+
+    @api.post("/v1beta/models/{call}")
+    async def models(call: str, request: Request):
+        model, _, method = call.partition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            return JSONResponse({"error": {"code": 404, "message": f"unknown method {method}"}}, status_code=404)
+        rejected = await admitted(method)
+        if rejected is not None:
+            return rejected
+
+        body = await request.json()
+        prompt = prompt_text(body)
+        content = answer(prompt)
+        prompt_tokens, output_tokens = _tokens(prompt), _tokens(content)
+        stats.output_tokens += output_tokens
+        first = settings.time_to_first_token(rng)
+        per_token = 1 / settings.tokens_per_second if settings.tokens_per_second else 0
+
+        if method == "generateContent":
+            try:
+                await asyncio.sleep(first + output_tokens * per_token)
+            finally:
+                stats.leave()
+            return _response(content, prompt_tokens, output_tokens)
+
+        step = settings.chunk_tokens * 4
+
+        async def events():
+            # A JSON array of GenerateContentResponse objects, written as tokens are "generated".
+            try:
+                await asyncio.sleep(first)
+                yield "["
+                for i in range(0, len(content), step):
+                    piece = content[i:i + step]
+                    await asyncio.sleep(_tokens(piece) * per_token)
+                    last = i + step >= len(content)
+                    yield ("" if i == 0 else ",\r\n") + json.dumps(
+                        _response(piece, prompt_tokens, _tokens(content[:i + step]), finished=last)
+                    )
+                yield "]"
+            finally:
+                stats.leave()
+
+        return StreamingResponse(events(), media_type="application/json")
+
+    @api.get("/stats")
+    def get_stats():
+        return stats.snapshot()
+
+    @api.post("/stats/reset")
+    def reset_stats():
+        nonlocal stats
+        stats = Stats()
+        return stats.snapshot()
+
+    return api
+
+
+def parser():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8090)
+    p.add_argument("--latency", choices=["fixed", "uniform", "exponential", "lognormal"], default="lognormal",
+                   help="distribution of the time to first token")
+    p.add_argument("--median", type=float, default=1.0, help="median seconds to first token")
+    p.add_argument("--sigma", type=float, default=0.5, help="spread of the lognormal distribution")
+    p.add_argument("--min-latency", type=float, default=0.0)
+    p.add_argument("--tokens-per-second", type=float, default=0, help="output token rate, 0 for instant")
+    p.add_argument("--chunk-tokens", type=int, default=16, help="tokens per streamed chunk")
+    p.add_argument("--error-429", type=float, default=0.0, help="fraction of calls rejected with 429")
+    p.add_argument("--error-500", type=float, default=0.0, help="fraction of calls failing with 500")
+    p.add_argument("--max-concurrency", type=int, default=0, help="429 beyond this many calls in flight, 0 for no limit")
+    p.add_argument("--requests-per-minute", type=int, default=0, help="429 beyond this quota, 0 for no limit")
+    p.add_argument("--unfenced", type=float, default=0.0, help="fraction of JSON answers without a ``` fence")
+    p.add_argument("--prose", type=float, default=0.0, help="fraction of answers wrapped in chatty prose")
+    p.add_argument("--seed", type=int, default=None)
+    return p
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    uvicorn.run(create_app(Settings(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
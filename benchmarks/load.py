@@ -0,0 +1,211 @@
+"""Mixed-traffic load test of the full service against the local Gemini stand-in.
+
+Starts gemini_server.py and the app under uvicorn, each in its own process,
+with the app using the real Gemini client over the REST transport. It then
+sends a weighted mix of endpoint requests at a fixed arrival rate (open
+loop, so a saturated service builds a queue the way it does in production).
+Reports per-route latency, status codes, and the rate limiter's and the
+stand-in's view of the run.
+
+    python benchmarks/load.py --rate 20 --duration 60 --workers 2 -- --median 1.5 --max-concurrency 16 --error-429 0.02
+
+Arguments after -- go to gemini_server.py.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+# (weight, method, path) -- roughly the production mix.
+MIX = [
+    (20, "POST", "/analyze_mvp"),
+    (10, "GET", "/analyze_mvp/stream"),
+    (15, "POST", "/analyze_market"),
+    (15, "POST", "/analyze_target_market"),
+    (10, "POST", "/analyze_investors"),
+    (10, "POST", "/analyze_competitors"),
+    (5, "POST", "/get_competitors"),
+    (5, "POST", "/get_startup_info"),
+    (5, "POST", "/generate_go_to_market_strategy"),
+    (3, "POST", "/analyze_all"),
+    (2, "POST", "/generate_graph"),
+]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_up(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with status {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start_servers(server_args, workers, env_overrides):
+    gemini_port, app_port = _free_port(), _free_port()
+    gemini = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "gemini_server.py"), "--port", str(gemini_port), *server_args],
+        stdout=sys.stderr,
+    )
+    env = {
+        **os.environ,
+        "GEMINI_TRANSPORT": "rest",
+        "GEMINI_API_ENDPOINT": f"http://127.0.0.1:{gemini_port}",
+        "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY", "local-stand-in"),
+        "RESPONSE_CACHE_ENABLED": "0",
+        "LOG_LEVEL": "WARNING",
+        **env_overrides,
+    }
+    service = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(app_port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=sys.stderr,
+    )
+    processes = [gemini, service]
+    try:
+        _wait_until_up(f"http://127.0.0.1:{gemini_port}/stats", gemini)
+        _wait_until_up(f"http://127.0.0.1:{app_port}/metrics", service)
+    except Exception:
+        stop(processes)
+        raise
+    return f"http://127.0.0.1:{gemini_port}", f"http://127.0.0.1:{app_port}", processes
+
+
+def stop(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def percentile(sorted_values, q):
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    ordered = sorted(seconds for seconds, _ in samples)
+    statuses = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(samples),
+        "statuses": statuses,
+        "mean_ms": round(statistics.mean(ordered) * 1000, 1),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+async def drive(app_url, rate, duration, niches, seed):
+    rng = random.Random(seed)
+    weights = [weight for weight, *_ in MIX]
+    counter = itertools.count()
+    samples = {}
+    tasks = []
+
+    async def one(client, method, path):
+        # A small pool of niches, so some traffic is repeated the way real users repeat themselves.
+        niche = f"load niche {rng.randrange(niches)}" if niches else f"load niche {next(counter)}"
+        start = time.perf_counter()
+        try:
+            async with client.stream(method, path, params={"market_niche": niche}) as response:
+                async for _ in response.aiter_bytes():
+                    pass
+                status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        samples.setdefault(f"{method} {path}", []).append((time.perf_counter() - start, status))
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=256)
+    async with httpx.AsyncClient(base_url=app_url, timeout=600, limits=limits) as client:
+        start = time.perf_counter()
+        next_at = start
+        while next_at - start < duration:
+            _, method, path = rng.choices(MIX, weights)[0]
+            tasks.append(asyncio.create_task(one(client, method, path)))
+            # Poisson arrivals at the target rate.
+            next_at += rng.expovariate(rate)
+            await asyncio.sleep(max(0, next_at - time.perf_counter()))
+        sent_for = time.perf_counter() - start
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+        rate_limit = (await client.get("/rate_limit/stats")).json()
+    everything = [sample for route in samples.values() for sample in route]
+    ok = sum(1 for _, status in everything if status == 200)
+    return {
+        "offered_rps": rate,
+        "sent": len(everything),
+        "sent_for_s": round(sent_for, 1),
+        "drained_after_s": round(elapsed, 1),
+        "completed_rps": round(ok / elapsed, 2),
+        "overall": summarize(everything),
+        "routes": {route: summarize(route_samples) for route, route_samples in sorted(samples.items())},
+        "rate_limiter": rate_limit,
+    }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    server_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, server_args = argv[:split], argv[split + 1:]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=10, help="requests per second offered to the service")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to keep sending")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--niches", type=int, default=0, help="draw niches from a pool of this size, 0 for all distinct")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE", help="extra service setting")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    overrides = dict(item.split("=", 1) for item in args.env)
+    gemini_url, app_url, processes = start_servers(server_args, args.workers, overrides)
+    try:
+        report = asyncio.run(drive(app_url, args.rate, args.duration, args.niches, args.seed))
+        report["gemini"] = httpx.get(f"{gemini_url}/stats").json()
+    finally:
+        stop(processes)
+
+    report = {"benchmark": "load", "workers": args.workers, "gemini_server_args": server_args, **report}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Microbenchmarks for the per-call CPU work around each model call.
+
+    python benchmarks/micro.py [--min-time 0.2] [--output micro.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+from fakes import configure_environment, sample
+
+configure_environment()
+
+# Niches in the index the niche_match_* cases search.
+NICHE_INDEX_SIZE = int(os.getenv("NICHE_INDEX_SIZE", "20000"))
+
+import app  # noqa: E402,F401  (registers every prompt)
+import business_generator  # noqa: E402
+import company_info  # noqa: E402
+import llm_output  # noqa: E402
+import niche_index  # noqa: E402
+import prompts  # noqa: E402
+import report_renderer  # noqa: E402
+import streaming  # noqa: E402
+
+
+def _payloads():
+    report = sample(business_generator.ComprehensiveReport, "report")
+    text = json.dumps(report)
+    return {
+        "clean": text,
+        "fenced": f"Here you go:\n```json\n{text}\n```\nLet me know if you need more.",
+        "trailing_commas": text.replace("}", ",}").replace("]", ",]"),
+        "truncated": text[: len(text) * 2 // 3],
+    }, report
+
+
+def _niche_index(size):
+    """An in-memory index of size synthetic niches, and a few to look up."""
+    rng = random.Random(0)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9))) for _ in range(5000)]
+    niches = [" ".join(rng.sample(words, rng.randint(2, 4))) for _ in range(size)]
+    index = niche_index.NicheIndex(":memory:", niche_index.NICHE_MATCH_THRESHOLD)
+    for niche in niches:
+        key = niche_index.normalize(niche)
+        index._insert(key, niche_index.bands(niche_index.ngrams(key)))
+    index._loaded = True
+    return index, niches[0], niches[1][:-1] + "x", " ".join(rng.sample(words, 3)) + " unseen"
+
+
+def cases():
+    payloads, report = _payloads()
+    startup = json.dumps(sample(company_info.StartUp, "startup"))
+    mvp = prompts.get("mvp")
+    section = prompts.get("report_product_feasibility_analysis")
+
+    def cold_compile():
+        mvp._compiled = None
+        mvp()
+
+    def stream_scan():
+        scanner = streaming.FieldScanner()
+        for i in range(0, len(payloads["clean"]), 64):
+            scanner.feed(payloads["clean"][i:i + 64])
+
+    yield "prompt_compile_cold", cold_compile
+    yield "prompt_get_warm", mvp
+    yield "prompt_format", lambda: mvp().format_prompt(market_niche="edtech in india", known_features="")
+    yield "prompt_format_report_section", lambda: section().format_prompt(market_niche="edtech in india")
+    yield "compact_schema_report", lambda: prompts.compact_schema(business_generator.ComprehensiveReport)
+    for name, payload in payloads.items():
+        yield f"extract_json_{name}", lambda payload=payload: llm_output.extract_json(payload)
+    yield "validate_startup_info", lambda: llm_output.validate(startup, company_info.StartUp)
+    yield "validate_report", lambda: llm_output.validate(payloads["fenced"], business_generator.ComprehensiveReport)
+    yield "field_scanner_report", stream_scan
+    index, exact, near, unseen = _niche_index(NICHE_INDEX_SIZE)
+    yield "niche_normalize", lambda: niche_index.normalize("Ed-Tech startups in India")
+    yield "niche_match_exact", lambda: index.match(exact)
+    yield "niche_match_near", lambda: index.match(near)
+    yield "niche_match_new", lambda: index.match(unseen)
+    yield "render_report_html", lambda: report_renderer.render_report(
+        report, business_generator.ComprehensiveReport, "Comprehensive Business Report", "edtech"
+    )
+
+
+def measure(fn, min_time):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    runs = sorted(timer.repeat(repeat=5, number=number))
+    per_call = [run / number for run in runs]
+    return {
+        "iterations": number,
+        "best_us": round(per_call[0] * 1e6, 3),
+        "median_us": round(per_call[len(per_call) // 2] * 1e6, 3),
+    }
+
+
+def run(min_time=0.2, only=None):
+    results = []
+    for name, fn in cases():
+        if only and name not in only:
+            continue
+        results.append({"name": name, **measure(fn, min_time)})
+        print(json.dumps(results[-1]), file=sys.stderr)
+    return {"benchmark": "micro", "python": sys.version.split()[0], "pid": os.getpid(), "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-time", type=float, default=0.2, help="rough seconds spent per repeat")
+    parser.add_argument("--case", action="append", help="only run this case (repeatable)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args.min_time, args.case)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
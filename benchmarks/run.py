@@ -0,0 +1,99 @@
+"""Run the offline benchmarks and compare them with a saved baseline.
+
+Each suite runs in its own interpreter so they cannot warm each other up.
+With --baseline, exits non-zero when any case is slower than the baseline by
+more than --tolerance (a fraction, default 0.25).
+
+    python benchmarks/run.py --output current.json
+    python benchmarks/run.py --baseline current.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _suite(script, *args):
+    with tempfile.TemporaryDirectory() as scratch:
+        output = os.path.join(scratch, "report.json")
+        subprocess.run([sys.executable, os.path.join(HERE, script), *args, "--output", output], check=True)
+        with open(output) as file:
+            return json.load(file)
+
+
+def _startup(runs):
+    import startup
+
+    seconds = sorted(startup.measure()["seconds"] for _ in range(runs))
+    return {"benchmark": "startup", "results": [{"name": "import_app", "median_ms": seconds[len(seconds) // 2] * 1000}]}
+
+
+def timings(report):
+    """Flatten all suites into {case: milliseconds}, lower is better."""
+    flat = {}
+    for result in report["startup"]["results"]:
+        flat[f"startup.{result['name']}"] = result["median_ms"]
+    for result in report["micro"]["results"]:
+        flat[f"micro.{result['name']}"] = result["median_us"] / 1000
+    for result in report["endpoints"]["results"]:
+        flat[f"endpoints.{result['method']} {result['route']} c={result['concurrency']}"] = result["p50_ms"]
+    return flat
+
+
+def compare(current, baseline, tolerance):
+    regressions = []
+    now, before = timings(current), timings(baseline)
+    for name in sorted(now.keys() & before.keys()):
+        if before[name] > 0 and now[name] > before[name] * (1 + tolerance):
+            regressions.append((name, before[name], now[name]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--output", help="write the combined JSON report here")
+    parser.add_argument("--concurrency", nargs="+", default=["1", "8", "32"])
+    parser.add_argument("--requests", default="64")
+    parser.add_argument("--latency", default="0.05")
+    args = parser.parse_args(argv)
+
+    report = {
+        "startup": _startup(5),
+        "micro": _suite("micro.py"),
+        "endpoints": _suite(
+            "endpoints.py", "--concurrency", *args.concurrency, "--requests", args.requests, "--latency", args.latency
+        ),
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(json.dumps(report, indent=2) + "\n")
+
+    errors = sum(result["errors"] for result in report["endpoints"]["results"])
+    uncovered = report["endpoints"]["uncovered_routes"]
+    failed = False
+    if errors:
+        print(f"FAIL: {errors} failed requests")
+        failed = True
+    if uncovered:
+        print(f"FAIL: routes without a benchmark: {', '.join(uncovered)}")
+        failed = True
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+        for name, before, now in regressions:
+            print(f"REGRESSION {name}: {before:.3f} ms -> {now:.3f} ms ({now / before - 1:+.0%})")
+        if regressions:
+            failed = True
+        else:
+            print(f"no regressions over {args.tolerance:.0%} against {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Cold-start import time of the API.
+
+Imports app.py in fresh interpreters, the way a new worker boots, and
+reports the median time. Fails when the median goes over the budget or when
+a dependency that should load lazily is pulled in at import time.
+
+    python benchmarks/startup.py [--runs 5] [--budget 1.0] [--top 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed once a request is served; importing any of them at boot is a regression.
+LAZY_MODULES = ["langchain", "langchain_google_genai", "selenium", "bing_image_urls", "PIL"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def _run(args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def measure():
+    import json
+
+    return json.loads(_run(["-c", PROBE]).stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(top):
+    """Modules imported directly by app.py, by cumulative import time (`python -X importtime`)."""
+    rows = []
+    for line in _run(["-X", "importtime", "-c", "import app"]).stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and name.startswith("   ") and not name.startswith("    "):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=float(os.getenv("STARTUP_BUDGET", "1.0")))
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    results = [measure() for _ in range(args.runs)]
+    seconds = [r["seconds"] for r in results]
+    loaded = sorted({m for r in results for m in r["loaded"]})
+    median = statistics.median(seconds)
+
+    print(f"import app: median {median * 1000:.0f} ms, min {min(seconds) * 1000:.0f} ms over {args.runs} runs")
+    print("slowest top-level imports:")
+    for micros, name in slowest_imports(args.top):
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: imported at startup, should be lazy: {', '.join(loaded)}")
+        failed = True
+    if median > args.budget:
+        print(f"FAIL: median {median:.3f}s is over the {args.budget:.3f}s budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+import metrics
+
+# Record and replay every model call, for debugging and reproducible runs.
+#   LLM_CASSETTE_MODE            "off" (default); "record" calls the model and saves
+#                                every response; "replay" answers only from the
+#                                cassette and never calls the model; "auto" replays
+#                                what is recorded and records the rest
+#   LLM_CASSETTE_PATH            SQLite file, default .cache/cassette.sqlite3
+#   LLM_CASSETTE_REPLAY_LATENCY  set to 1 to take as long as the recorded call did
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off")
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", ".cache/cassette.sqlite3")
+LLM_CASSETTE_REPLAY_LATENCY = os.getenv("LLM_CASSETTE_REPLAY_LATENCY", "0") == "1"
+
+
+class CassetteMiss(LookupError):
+    """A replayed run issued a prompt that was never recorded."""
+
+
+def prompt_key(model, temperature, prompt):
+    material = json.dumps([model, temperature, prompt])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Model responses keyed by a hash of the model settings and prompt text.
+
+    Only the hash of a prompt is stored; responses are zlib-compressed JSON.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS calls ("
+                "key TEXT PRIMARY KEY, analyzer TEXT NOT NULL, prompt_chars INTEGER NOT NULL, "
+                "response BLOB NOT NULL, latency REAL NOT NULL, recorded REAL NOT NULL)"
+            )
+        return self._db
+
+    def get(self, key):
+        """Return the recorded {"content", "usage", "latency"} for key, or None."""
+        with self._lock:
+            row = self._connection().execute("SELECT response, latency FROM calls WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.LLM_CASSETTE_REQUESTS.labels(analyzer=metrics.analyzer(), result="miss" if row is None else "hit").inc()
+        if row is None:
+            return None
+        entry = json.loads(zlib.decompress(row[0]))
+        entry["latency"] = row[1]
+        return entry
+
+    def put(self, key, prompt_chars, content, usage, latency):
+        response = zlib.compress(json.dumps({"content": content, "usage": usage}).encode("utf-8"))
+        with self._lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO calls (key, analyzer, prompt_chars, response, latency, recorded) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, metrics.analyzer(), prompt_chars, response, latency, time.time()),
+            )
+            db.commit()
+            self.recorded += 1
+
+    def clear(self):
+        with self._lock:
+            db = self._connection()
+            db.execute("DELETE FROM calls")
+            db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = {"entries": 0, "bytes": 0}
+            if LLM_CASSETTE_MODE != "off":
+                count, size = self._connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(LENGTH(response)), 0) FROM calls"
+                ).fetchone()
+                entries = {"entries": count, "bytes": size}
+            return {
+                "mode": LLM_CASSETTE_MODE,
+                "path": self.path,
+                "hits": self.hits,
+                "misses": self.misses,
+                "recorded": self.recorded,
+                **entries,
+            }
+
+
+tape = Cassette(LLM_CASSETTE_PATH)
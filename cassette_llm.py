@@ -0,0 +1,90 @@
+import asyncio
+import time
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import Runnable
+from cassette import LLM_CASSETTE_REPLAY_LATENCY, CassetteMiss, prompt_key
+import metrics
+
+# Replayed streams are cut into chunks of this many characters.
+REPLAY_CHUNK_CHARS = 64
+
+
+def _text(input):
+    return input.to_string() if hasattr(input, "to_string") else str(input)
+
+
+class CassetteLLM(Runnable):
+    """Records a chat model's calls to a Cassette, or answers them from it.
+
+    Sits outermost in `prompt | llm` chains, so a replayed call skips the rate
+    limiter and the network entirely. In "replay" mode llm may be None.
+    """
+
+    def __init__(self, llm, tape, mode, model, temperature):
+        self.llm = llm
+        self.tape = tape
+        self.mode = mode
+        self._model = model
+        self.temperature = temperature
+
+    @property
+    def model(self):
+        return getattr(self.llm, "model", None) or self._model
+
+    def _lookup(self, input):
+        """Return (key, prompt, recorded entry or None)."""
+        prompt = _text(input)
+        key = prompt_key(self._model, self.temperature, prompt)
+        entry = None if self.mode == "record" else self.tape.get(key)
+        if entry is None and self.mode == "replay":
+            raise CassetteMiss(f"no recorded response for {metrics.analyzer()} prompt {key[:12]}")
+        return key, prompt, entry
+
+    def _record(self, key, prompt, content, usage, start):
+        self.tape.put(key, len(prompt), content, usage, time.monotonic() - start)
+
+    @staticmethod
+    def _message(entry):
+        return AIMessage(content=entry["content"], usage_metadata=entry["usage"])
+
+    def invoke(self, input, config=None, **kwargs):
+        key, prompt, entry = self._lookup(input)
+        if entry is not None:
+            if LLM_CASSETTE_REPLAY_LATENCY:
+                time.sleep(entry["latency"])
+            return self._message(entry)
+        start = time.monotonic()
+        result = self.llm.invoke(input, config, **kwargs)
+        self._record(key, prompt, result.content, getattr(result, "usage_metadata", None), start)
+        return result
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        key, prompt, entry = self._lookup(input)
+        if entry is not None:
+            if LLM_CASSETTE_REPLAY_LATENCY:
+                await asyncio.sleep(entry["latency"])
+            return self._message(entry)
+        start = time.monotonic()
+        result = await self.llm.ainvoke(input, config, **kwargs)
+        self._record(key, prompt, result.content, getattr(result, "usage_metadata", None), start)
+        return result
+
+    async def astream(self, input, config=None, **kwargs):
+        key, prompt, entry = self._lookup(input)
+        if entry is not None:
+            content = entry["content"]
+            pieces = [content[i:i + REPLAY_CHUNK_CHARS] for i in range(0, len(content), REPLAY_CHUNK_CHARS)] or [""]
+            for i, piece in enumerate(pieces):
+                if LLM_CASSETTE_REPLAY_LATENCY:
+                    await asyncio.sleep(entry["latency"] / len(pieces))
+                last = i == len(pieces) - 1
+                yield AIMessageChunk(content=piece, usage_metadata=entry["usage"] if last else None)
+            return
+        start = time.monotonic()
+        parts, usage = [], None
+        async for chunk in self.llm.astream(input, config, **kwargs):
+            parts.append(chunk.content)
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            yield chunk
+        # Only a stream that ran to completion is recorded.
+        self._record(key, prompt, "".join(parts), usage, start)
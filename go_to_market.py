@@ -0,0 +1,75 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from llm_provider import get_llm
+import prompts
+from llm_output import aparse_response, parse_response
+from response_cache import cached
+from singleflight import coalesced
+from streaming import stream_analysis
+
+router = APIRouter()
+
+
+class GoToMarketStrategy(BaseModel):
+    target_market_and_segments: str
+    value_proposition_and_positioning: str
+    pricing_strategy: str
+    marketing_and_communication_plan: str
+    sales_strategy: str
+    kpis: str
+    summary: str
+
+_build_go_to_market_prompt = prompts.register(
+    "go_to_market",
+    GoToMarketStrategy,
+    template="""
+        Analyze the market for a startup in the following niche: {market_niche}
+
+        Provide a detailed go-to-market strategy with the following structure:
+        1. 🎯 Defining the Target Market and Customer Segments: (text)
+        2. 🌟 Developing a Unique Value Proposition and Positioning: (text)
+        3. 💰 Setting an Optimal Pricing Strategy: (text)
+        4. 📣 Creating a Marketing and Communication Plan: (text)
+        5. 🎯 Designing a Tailored Sales Strategy: (text)
+        6. 📈 Tracking Success with Key Performance Indicators (KPIs): (text)
+        7. Summary: (text)
+
+        Give data as JSON.
+        """,
+    input_variables=["market_niche"],
+)
+
+
+@coalesced("go_to_market")
+@cached("go_to_market", _build_go_to_market_prompt)
+def generate_go_to_market_strategy(market_niche: str):
+    prompt_and_model = _build_go_to_market_prompt() | get_llm()
+    output_json = prompt_and_model.invoke({"market_niche": market_niche})
+    return parse_response(output_json, GoToMarketStrategy)
+
+
+@coalesced("go_to_market")
+@cached("go_to_market", _build_go_to_market_prompt)
+async def agenerate_go_to_market_strategy(market_niche: str):
+    prompt_and_model = _build_go_to_market_prompt() | get_llm()
+    output_json = await prompt_and_model.ainvoke({"market_niche": market_niche})
+    return await aparse_response(output_json, GoToMarketStrategy)
+
+
+def stream_go_to_market_strategy(market_niche: str):
+    return stream_analysis(
+        "go_to_market", _build_go_to_market_prompt, get_llm(), {"market_niche": market_niche}, GoToMarketStrategy
+    )
+
+@router.post("/generate_go_to_market_strategy")
+async def generate_go_to_market_strategy_info(market_niche: str):
+    try:
+        analysis = await agenerate_go_to_market_strategy(market_niche)
+        return {"go_to_market_strategy": analysis}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/generate_go_to_market_strategy/stream")
+async def generate_go_to_market_strategy_stream(market_niche: str):
+    return stream_go_to_market_strategy(market_niche)
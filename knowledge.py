@@ -0,0 +1,159 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import metrics
+import niche_index
+
+# Entities discovered for a niche (competitors, features, investors), shared
+# by every analyzer: whichever runs first records them, later ones reuse them
+# instead of asking the model again and so stay consistent with each other.
+#   KNOWLEDGE_ENABLED   set to 0 to have every analyzer discover entities itself
+#   KNOWLEDGE_PATH      SQLite file, default .cache/knowledge.sqlite3
+#   KNOWLEDGE_TTL       lifetime of a niche's entities in seconds, default 7 days
+KNOWLEDGE_ENABLED = os.getenv("KNOWLEDGE_ENABLED", "1") != "0"
+KNOWLEDGE_PATH = os.getenv("KNOWLEDGE_PATH", ".cache/knowledge.sqlite3")
+KNOWLEDGE_TTL = float(os.getenv("KNOWLEDGE_TTL", str(7 * 24 * 3600)))
+
+COMPETITORS = "competitors"
+FEATURES = "features"
+INVESTORS = "investors"
+KINDS = (COMPETITORS, FEATURES, INVESTORS)
+
+
+class KnowledgeStore:
+    """Ordered named entities per (niche, kind); the first list recorded wins.
+
+    A later record of the same kind only fills in details for entities that
+    are already known, so every view of a niche names the same companies.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # The primary key doubles as the index for lookups by niche.
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entities ("
+                "niche TEXT NOT NULL, kind TEXT NOT NULL, position INTEGER NOT NULL, name TEXT NOT NULL, "
+                "details TEXT NOT NULL, source TEXT NOT NULL, updated REAL NOT NULL, "
+                "PRIMARY KEY (niche, kind, position))"
+            )
+        return self._db
+
+    def _rows(self, db, niche, kind, now):
+        return db.execute(
+            "SELECT position, name, details FROM entities WHERE niche = ? AND kind = ? AND updated >= ? "
+            "ORDER BY position",
+            (niche, kind, now - self.ttl),
+        ).fetchall()
+
+    def get(self, market_niche, kind):
+        """Known entities as [{"name": ..., **details}], in the order first recorded."""
+        now = time.time()
+        with self._lock:
+            rows = self._rows(self._connection(), niche_index.canonical(market_niche), kind, now)
+            if rows:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.KNOWLEDGE_REQUESTS.labels(kind=kind, result="hit" if rows else "miss").inc()
+        return [{"name": name, **json.loads(details)} for _, name, details in rows]
+
+    def names(self, market_niche, kind):
+        return [entity["name"] for entity in self.get(market_niche, kind)]
+
+    def record(self, market_niche, kind, entities, source):
+        """Remember entities ({"name": ..., **details}) found by the source analyzer."""
+        niche, now = niche_index.canonical(market_niche), time.time()
+        entities = [e for e in entities if str(e.get("name", "")).strip()]
+        if not entities:
+            return
+        with self._lock:
+            db = self._connection()
+            known = self._rows(db, niche, kind, now)
+            if known:
+                by_name = {name.strip().lower(): (position, json.loads(details)) for position, name, details in known}
+                for entity in entities:
+                    match = by_name.get(entity["name"].strip().lower())
+                    extra = {k: v for k, v in entity.items() if k != "name" and v}
+                    if match and extra.keys() - match[1].keys():
+                        db.execute(
+                            "UPDATE entities SET details = ? WHERE niche = ? AND kind = ? AND position = ?",
+                            (json.dumps({**extra, **match[1]}), niche, kind, match[0]),
+                        )
+            else:
+                db.execute("DELETE FROM entities WHERE niche = ? AND kind = ?", (niche, kind))
+                db.executemany(
+                    "INSERT INTO entities (niche, kind, position, name, details, source, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (niche, kind, i, e["name"].strip(),
+                         json.dumps({k: v for k, v in e.items() if k != "name" and v}), source, now)
+                        for i, e in enumerate(entities)
+                    ],
+                )
+                self.recorded += 1
+            db.commit()
+
+    def niche(self, market_niche):
+        """Everything known about one niche, by kind."""
+        return {kind: self.get(market_niche, kind) for kind in KINDS}
+
+    def clear(self):
+        with self._lock:
+            db = self._connection()
+            db.execute("DELETE FROM entities")
+            db.commit()
+
+    def stats(self):
+        with self._lock:
+            niches = self._connection().execute(
+                "SELECT COUNT(DISTINCT niche) FROM entities WHERE updated >= ?", (time.time() - self.ttl,)
+            ).fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "enabled": KNOWLEDGE_ENABLED,
+                "niches": niches,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "recorded": self.recorded,
+            }
+
+
+store = KnowledgeStore(KNOWLEDGE_PATH, KNOWLEDGE_TTL)
+
+
+def known(market_niche, kind):
+    """Known entities for the niche, or [] when the store is disabled."""
+    if not KNOWLEDGE_ENABLED:
+        return []
+    return store.get(market_niche, kind)
+
+
+def remember(market_niche, kind, entities, source):
+    if KNOWLEDGE_ENABLED:
+        store.record(market_niche, kind, entities, source)
+
+
+def context(market_niche, kind, instruction):
+    """A prompt line listing the known entities, or "" if none are known yet.
+
+    instruction is formatted with {names}, e.g. "Cover these competitors: {names}."
+    """
+    names = [entity["name"] for entity in known(market_niche, kind)]
+    return instruction.format(names=", ".join(names)) if names else ""
@@ -0,0 +1,42 @@
+from langchain_core.runnables import Runnable
+from prompts import estimate_tokens
+from rate_limiter import GEMINI_OUTPUT_TOKEN_ESTIMATE
+
+
+def _estimate(input):
+    text = input.to_string() if hasattr(input, "to_string") else str(input)
+    return estimate_tokens(text) + GEMINI_OUTPUT_TOKEN_ESTIMATE
+
+
+def _used(message):
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+
+class RateLimitedLLM(Runnable):
+    """Runs every call of a chat model through a RateLimiter.
+
+    Drops into `prompt | llm` chains in place of the model itself, so each
+    analyzer's invoke/ainvoke/astream is throttled and retried without
+    changes at the call site.
+    """
+
+    def __init__(self, llm, limiter):
+        self.llm = llm
+        self.limiter = limiter
+
+    @property
+    def model(self):
+        return getattr(self.llm, "model", None)
+
+    def invoke(self, input, config=None, **kwargs):
+        return self.limiter.call(lambda: self.llm.invoke(input, config, **kwargs), _estimate(input), _used)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return await self.limiter.acall(lambda: self.llm.ainvoke(input, config, **kwargs), _estimate(input), _used)
+
+    async def astream(self, input, config=None, **kwargs):
+        async for chunk in self.limiter.astream(
+            lambda: self.llm.astream(input, config, **kwargs), _estimate(input), _used
+        ):
+            yield chunk
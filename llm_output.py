@@ -0,0 +1,171 @@
+import json
+import logging
+import re
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from llm_provider import get_llm
+import metrics
+import prompts
+import structured_logging
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.S)
+_ANY_FENCE = re.compile(r"```[\w-]*[ \t]*\n?(.*?)(?:```|$)", re.S)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+REPAIR_TEMPLATE = """
+The text below was supposed to be a single JSON document but it could not be used: {error}
+
+{format_instructions}
+
+Return only the corrected JSON, keeping all of the original content.
+
+Text:
+{content}
+"""
+
+logger = logging.getLogger(__name__)
+
+stats = {"parsed": 0, "locally_repaired": 0, "llm_repaired": 0, "failed": 0}
+
+
+class OutputParseError(ValueError):
+    pass
+
+
+def _balanced(text, start):
+    """Return text[start:] cut after the matching bracket, or closed off if truncated."""
+    stack, in_string, escape = [], False, False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return text[start:i + 1], False
+
+    # Truncated output: close the open string, drop a dangling key or comma
+    # and close every open container. A trailing string is a key only inside
+    # an object; in an array it is the last value.
+    body = text[start:]
+    if in_string:
+        body += '"'
+    dangling = r'(,\s*"[^"]*"\s*:?\s*|,\s*|:\s*)$' if stack and stack[-1] == "}" else r",\s*$"
+    body = re.sub(dangling, "", body.rstrip())
+    return body + "".join(reversed(stack)), True
+
+
+def extract_json(content):
+    """Pull a JSON value out of a model response, fenced or not.
+
+    Returns (data, repaired) where repaired is True when the text had to be
+    patched up locally (trailing commas, truncated output).
+    """
+    candidates = [m.group(1) for m in _FENCE.finditer(content)] + [content]
+    last_error = None
+    for text in candidates:
+        starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+        if not starts:
+            continue
+        body, truncated = _balanced(text, min(starts))
+        for attempt, repaired in ((body, truncated), (_TRAILING_COMMA.sub(r"\1", body), True)):
+            try:
+                return json.loads(attempt), repaired
+            except ValueError as e:
+                last_error = e
+    raise OutputParseError(f"no JSON found in model response: {last_error}")
+
+
+def extract_fenced(content, language):
+    """The body of the ```language block in a model response.
+
+    Falls back to the first fenced block of any language, then to the whole
+    response when the model left the fences off; an unclosed fence (output
+    cut short) runs to the end.
+    """
+    match = re.search(rf"```{re.escape(language)}\b[ \t]*\n?(.*?)(?:```|$)", content, re.S | re.I)
+    match = match or _ANY_FENCE.search(content)
+    return (match.group(1) if match else content).strip()
+
+
+def _coerce(data, model):
+    # A bare list for a schema with a single list field, e.g. Features.lists.
+    fields = getattr(model, "model_fields", None) or model.__fields__
+    if isinstance(data, list) and len(fields) == 1:
+        return {next(iter(fields)): data}
+    return data
+
+
+def validate(content, model):
+    with metrics.timed(metrics.LLM_OUTPUT_PARSE_SECONDS, analyzer=metrics.analyzer()):
+        data, repaired = extract_json(content)
+        try:
+            return jsonable_encoder(model(**_coerce(data, model))), repaired
+        except (TypeError, ValidationError) as e:
+            raise OutputParseError(str(e))
+
+
+def _repair_prompt(model):
+    return prompts.register(
+        f"repair_{model.__name__}", model, template=REPAIR_TEMPLATE, input_variables=["error", "content"]
+    )()
+
+
+def _count(outcome):
+    stats[outcome] += 1
+    metrics.LLM_OUTPUTS.labels(analyzer=metrics.analyzer(), outcome=outcome).inc()
+
+
+def _failed(content, error):
+    _count("failed")
+    structured_logging.raw_response(logger, content, error, stage="repair")
+    return HTTPException(status_code=500, detail="Invalid JSON response from language model")
+
+
+def _first_pass(content, model):
+    try:
+        output, repaired = validate(content, model)
+    except OutputParseError as e:
+        structured_logging.raw_response(logger, content, e, stage="first_pass")
+        return None, e
+    structured_logging.raw_response(logger, content)
+    _count("locally_repaired" if repaired else "parsed")
+    return output, None
+
+
+def parse_response(output_json, model):
+    """Validate a model response against `model`, repairing it with one cheap LLM pass if needed."""
+    output, error = _first_pass(output_json.content, model)
+    if error is None:
+        return output
+    fixed = (_repair_prompt(model) | get_llm()).invoke({"error": str(error), "content": output_json.content})
+    try:
+        output, _ = validate(fixed.content, model)
+    except OutputParseError as e:
+        raise _failed(fixed.content, e)
+    _count("llm_repaired")
+    return output
+
+
+async def aparse_response(output_json, model):
+    output, error = _first_pass(output_json.content, model)
+    if error is None:
+        return output
+    fixed = await (_repair_prompt(model) | get_llm()).ainvoke({"error": str(error), "content": output_json.content})
+    try:
+        output, _ = validate(fixed.content, model)
+    except OutputParseError as e:
+        raise _failed(fixed.content, e)
+    _count("llm_repaired")
+    return output
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cassette
+import rate_limiter
+
+# Every analyzer shares one Gemini client. Configure it through the environment:
+#   GOOGLE_API_KEY          API key for the Gemini API (required)
+#   GEMINI_MODEL            model name, default gemini-1.0-pro
+#   GEMINI_TEMPERATURE      sampling temperature, default 0.0
+#   GEMINI_TRANSPORT        "grpc" (default) or "rest"
+#   GEMINI_API_ENDPOINT     override the API host, e.g. for a local stand-in
+#   GEMINI_TIMEOUT          per-request timeout in seconds
+#   GEMINI_POOL_SIZE        threads running calls over the rest transport, default 32
+#   GEMINI_KEEPALIVE_MS     keep-alive ping interval for the gRPC channel
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.0-pro")
+GEMINI_TEMPERATURE = float(os.getenv("GEMINI_TEMPERATURE", "0.0"))
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT", "grpc")
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "generativelanguage.googleapis.com")
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "120"))
+GEMINI_POOL_SIZE = int(os.getenv("GEMINI_POOL_SIZE", "32"))
+GEMINI_KEEPALIVE_MS = int(os.getenv("GEMINI_KEEPALIVE_MS", "30000"))
+
+_llm = None
+# Set while the shared model is our own gRPC Gemini client, whose async
+# client still has to be attached inside an event loop.
+_needs_async_client = False
+_metered = None
+_limited = None
+_recording = None
+_rest_executor = None
+_lock = threading.Lock()
+
+
+class UnretriedError(Exception):
+    """A Gemini API error carried past langchain's own retry loop.
+
+    ChatGoogleGenerativeAI retries every GoogleAPIError itself, waiting up to
+    a minute, with no setting to turn that off. Raised in its place, a failed
+    attempt reaches the rate limiter at once; MeteredLLM unwraps it.
+    """
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+class _SingleAttemptClient:
+    """A Gemini client whose generate calls raise UnretriedError for API errors."""
+
+    _CALLS = ("generate_content", "stream_generate_content")
+
+    def __init__(self, client, asynchronous):
+        self._client = client
+        self._asynchronous = asynchronous
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+        if name not in self._CALLS:
+            return method
+        from google.api_core.exceptions import GoogleAPIError, InvalidArgument
+
+        # langchain turns InvalidArgument into its own error without retrying.
+        if self._asynchronous:
+            async def call(*args, **kwargs):
+                try:
+                    return await method(*args, **kwargs)
+                except InvalidArgument:
+                    raise
+                except GoogleAPIError as e:
+                    raise UnretriedError(e) from e
+        else:
+            def call(*args, **kwargs):
+                try:
+                    return method(*args, **kwargs)
+                except InvalidArgument:
+                    raise
+                except GoogleAPIError as e:
+                    raise UnretriedError(e) from e
+        return call
+
+
+def _channel_options():
+    return [
+        ("grpc.keepalive_time_ms", GEMINI_KEEPALIVE_MS),
+        ("grpc.keepalive_timeout_ms", 10000),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+        ("grpc.max_receive_message_length", 32 * 1024 * 1024),
+    ]
+
+
+def _api_key_credentials():
+    from google.auth.api_key import Credentials
+
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise RuntimeError("GOOGLE_API_KEY is not set")
+    return Credentials(api_key)
+
+
+def _build_grpc_client():
+    from google.ai.generativelanguage_v1beta import GenerativeServiceClient
+    from google.ai.generativelanguage_v1beta.services.generative_service.transports import GenerativeServiceGrpcTransport
+
+    credentials = _api_key_credentials()
+    channel = GenerativeServiceGrpcTransport.create_channel(
+        host=GEMINI_API_ENDPOINT, credentials=credentials, options=_channel_options()
+    )
+    return GenerativeServiceClient(transport=GenerativeServiceGrpcTransport(host=GEMINI_API_ENDPOINT, channel=channel))
+
+
+def _build_grpc_async_client():
+    from google.ai.generativelanguage_v1beta import GenerativeServiceAsyncClient
+    from google.ai.generativelanguage_v1beta.services.generative_service.transports import GenerativeServiceGrpcAsyncIOTransport
+
+    credentials = _api_key_credentials()
+    channel = GenerativeServiceGrpcAsyncIOTransport.create_channel(
+        host=GEMINI_API_ENDPOINT, credentials=credentials, options=_channel_options()
+    )
+    return GenerativeServiceAsyncClient(transport=GenerativeServiceGrpcAsyncIOTransport(host=GEMINI_API_ENDPOINT, channel=channel))
+
+
+def _create_llm():
+    # Imported here: the Gemini SDK takes about a second to import and is
+    # not needed until the first analysis runs.
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    llm = ChatGoogleGenerativeAI(
+        model=GEMINI_MODEL,
+        temperature=GEMINI_TEMPERATURE,
+        transport=GEMINI_TRANSPORT,
+        client_options={"api_endpoint": GEMINI_API_ENDPOINT},
+        timeout=GEMINI_TIMEOUT,
+    )
+    if GEMINI_TRANSPORT == "grpc":
+        llm.client = _build_grpc_client()
+        # The async client binds to the running event loop; it is attached
+        # lazily by get_llm() the first time it is called from async code.
+        llm.async_client = None
+    elif GEMINI_TRANSPORT == "rest":
+        # The SDK's async client cannot drive the synchronous REST transport
+        # (awaiting its result raises TypeError), so async calls run the sync
+        # client on threads of our own.
+        llm.async_client = None
+    # Retrying and backing off is left to the rate limiter alone.
+    llm.client = _SingleAttemptClient(llm.client, asynchronous=False)
+    if GEMINI_TRANSPORT == "rest":
+        return _threaded(llm)
+    return llm
+
+
+def _threaded(llm):
+    global _rest_executor
+    from threaded_llm import ThreadedLLM
+
+    if _rest_executor is None:
+        _rest_executor = ThreadPoolExecutor(GEMINI_POOL_SIZE, thread_name_prefix="gemini-rest")
+    return ThreadedLLM(llm, _rest_executor)
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def get_llm():
+    """Return the process-wide chat model, creating it on first use."""
+    global _llm, _needs_async_client
+    if cassette.LLM_CASSETTE_MODE == "replay":
+        # Everything comes from the cassette: no client, no API key, no network.
+        return _with_cassette(None)
+    if _llm is None:
+        with _lock:
+            if _llm is None:
+                _llm = _create_llm()
+                _needs_async_client = GEMINI_TRANSPORT == "grpc"
+    llm = _llm
+    if _needs_async_client and llm.async_client is None and _in_event_loop():
+        llm.async_client = _SingleAttemptClient(_build_grpc_async_client(), asynchronous=True)
+    return _with_cassette(_rate_limited(_measured(llm)))
+
+
+def _measured(llm):
+    """Wrap the model so every call attempt is timed and its tokens counted."""
+    global _metered
+    metered = _metered
+    if metered is None or metered.llm is not llm:
+        from metered_llm import MeteredLLM
+
+        metered = _metered = MeteredLLM(llm)
+    return metered
+
+
+def _rate_limited(llm):
+    """Wrap the model so every call goes through the shared rate limiter."""
+    global _limited
+    if not rate_limiter.GEMINI_RATE_LIMIT_ENABLED:
+        return llm
+    limited = _limited
+    if limited is None or limited.llm is not llm:
+        from limited_llm import RateLimitedLLM
+
+        limited = _limited = RateLimitedLLM(llm, rate_limiter.limiter)
+    return limited
+
+
+def _with_cassette(llm):
+    """Record the model's calls to, or replay them from, the cassette if enabled."""
+    global _recording
+    if cassette.LLM_CASSETTE_MODE == "off":
+        return llm
+    recording = _recording
+    if recording is None or recording.llm is not llm:
+        from cassette_llm import CassetteLLM
+
+        recording = _recording = CassetteLLM(
+            llm, cassette.tape, cassette.LLM_CASSETTE_MODE, GEMINI_MODEL, GEMINI_TEMPERATURE
+        )
+    return recording
+
+
+def set_llm(llm):
+    """Replace the shared chat model, e.g. with a local fake for benchmarks."""
+    global _llm, _needs_async_client
+    with _lock:
+        _llm = llm
+        _needs_async_client = False
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import logo_store
+import metrics
+from response_cache import ResponseCache, normalize_niche
+
+# Company logos are resolved concurrently and remembered by company name.
+#   LOGO_LOOKUP_WORKERS       max concurrent lookups, default 8
+#   LOGO_LOOKUP_TIMEOUT       seconds to wait for a batch of lookups, default 5
+#   LOGO_CACHE_PATH           SQLite file, default .cache/logos.sqlite3
+#   LOGO_CACHE_TTL            lifetime of a found logo, default 30 days
+#   LOGO_NEGATIVE_CACHE_TTL   lifetime of a "no logo found" entry, default 1 day
+#   LOGO_PROXY_ENABLED        serve logos from our own /logos endpoint, default 1
+LOGO_LOOKUP_WORKERS = int(os.getenv("LOGO_LOOKUP_WORKERS", "8"))
+LOGO_LOOKUP_TIMEOUT = float(os.getenv("LOGO_LOOKUP_TIMEOUT", "5"))
+LOGO_CACHE_PATH = os.getenv("LOGO_CACHE_PATH", ".cache/logos.sqlite3")
+LOGO_CACHE_TTL = float(os.getenv("LOGO_CACHE_TTL", str(30 * 24 * 3600)))
+LOGO_NEGATIVE_CACHE_TTL = float(os.getenv("LOGO_NEGATIVE_CACHE_TTL", str(24 * 3600)))
+LOGO_PROXY_ENABLED = os.getenv("LOGO_PROXY_ENABLED", "1") != "0"
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=LOGO_LOOKUP_WORKERS, thread_name_prefix="logo-lookup")
+logo_cache = ResponseCache(LOGO_CACHE_PATH, LOGO_CACHE_TTL, 4096, 100000)
+
+
+def bing_backend(company_name):
+    """Default backend: first Bing image result for the company's logo."""
+    from bing_image_urls import bing_image_urls
+
+    urls = bing_image_urls(f"{company_name} Company Logo", limit=1)
+    return urls[0] if urls else None
+
+
+_backend = bing_backend
+
+
+def set_backend(backend):
+    """Swap the lookup backend, a callable taking a company name and returning a URL or None."""
+    global _backend
+    _backend = backend
+
+
+def _cached(name):
+    hit, entry = logo_cache.get(normalize_niche(name))
+    if hit and not entry["url"] and time.time() - entry["at"] >= LOGO_NEGATIVE_CACHE_TTL:
+        hit = False
+    metrics.LOGO_CACHE_REQUESTS.labels(result="hit" if hit else "miss").inc()
+    return (True, entry["url"]) if hit else (False, None)
+
+
+def _lookup(name):
+    start = time.perf_counter()
+    try:
+        url = _backend(name) or ""
+    except Exception as e:
+        logger.warning("logo lookup failed", extra={"fields": {"company": name, "error": str(e)}})
+        url = ""
+    if url and not logo_store.is_web_url(url):
+        logger.warning("logo url rejected", extra={"fields": {"company": name, "url": url}})
+        url = ""
+    if url and LOGO_PROXY_ENABLED:
+        try:
+            url = logo_store.logo_path(logo_store.store(url))
+        except Exception as e:
+            # Fall back to the third-party URL rather than dropping the logo.
+            logger.warning("logo store failed", extra={"fields": {"company": name, "error": str(e)}})
+    logo_cache.set(normalize_niche(name), {"url": url, "at": time.time()})
+    metrics.LOGO_LOOKUP_SECONDS.labels(result="found" if url else "missing").observe(time.perf_counter() - start)
+    return url
+
+
+def _start(names):
+    logos, pending = {}, {}
+    for name in dict.fromkeys(names):
+        hit, url = _cached(name)
+        if hit:
+            logos[name] = url
+        else:
+            pending[name] = _executor.submit(_lookup, name)
+    return logos, pending
+
+
+def _collect(logos, pending):
+    for name, future in pending.items():
+        # Lookups still running after the timeout resolve to "" for this
+        # request but are not negatively cached; they finish in the background.
+        logos[name] = future.result() if future.done() and not future.exception() else ""
+    return logos
+
+
+def resolve_logos(names):
+    """Map each company name to a logo URL ("" when none was found in time)."""
+    logos, pending = _start(names)
+    if pending:
+        wait(pending.values(), timeout=LOGO_LOOKUP_TIMEOUT)
+    return _collect(logos, pending)
+
+
+async def aresolve_logos(names):
+    # The logo cache is SQLite; read it off the event loop.
+    logos, pending = await asyncio.to_thread(_start, names)
+    if pending:
+        await asyncio.wait([asyncio.wrap_future(f) for f in pending.values()], timeout=LOGO_LOOKUP_TIMEOUT)
+    return _collect(logos, pending)
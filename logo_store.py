@@ -0,0 +1,105 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+import urllib.parse
+import urllib.request
+from response_cache import ResponseCache
+
+# Logos are downloaded once, shrunk to a PNG thumbnail and stored on disk under
+# their content hash so they can be served from /logos/<digest> forever.
+# Cached analyses keep the bare /logos/<digest> path; it is made absolute for
+# each response, so the API host can change without invalidating any cache.
+#   LOGO_STORE_DIR          directory holding the thumbnails, default .cache/logos
+#   LOGO_THUMBNAIL_SIZE     longest edge of the stored thumbnail in pixels, default 128
+#   LOGO_DOWNLOAD_TIMEOUT   seconds allowed for one download, default 5
+#   LOGO_MAX_BYTES          largest source image we are willing to fetch, default 5 MB
+#   LOGO_PUBLIC_BASE        prefix for served logo URLs, e.g. https://api.example.com;
+#                           default unset, using the host each request was made to
+LOGO_STORE_DIR = os.getenv("LOGO_STORE_DIR", ".cache/logos")
+LOGO_THUMBNAIL_SIZE = int(os.getenv("LOGO_THUMBNAIL_SIZE", "128"))
+LOGO_DOWNLOAD_TIMEOUT = float(os.getenv("LOGO_DOWNLOAD_TIMEOUT", "5"))
+LOGO_MAX_BYTES = int(os.getenv("LOGO_MAX_BYTES", str(5 * 1024 * 1024)))
+LOGO_PUBLIC_BASE = os.getenv("LOGO_PUBLIC_BASE", "").rstrip("/")
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+_index = ResponseCache(os.path.join(LOGO_STORE_DIR, "index.sqlite3"), 365 * 24 * 3600, 4096, 100000)
+
+
+def is_web_url(url):
+    """Whether url is http(s). Logo URLs come from scraped search results, and
+    urlopen would just as happily read file:// or ftp:// ones."""
+    parts = urllib.parse.urlsplit(url)
+    return parts.scheme.lower() in ("http", "https") and bool(parts.netloc)
+
+
+class _WebRedirects(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not is_web_url(newurl):
+            raise ValueError(f"refusing to follow a logo redirect to {newurl!r}")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+_opener = urllib.request.build_opener(_WebRedirects)
+
+
+def _download(url):
+    if not is_web_url(url):
+        raise ValueError(f"refusing to fetch a logo from {url!r}")
+    request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    with _opener.open(request, timeout=LOGO_DOWNLOAD_TIMEOUT) as response:
+        data = response.read(LOGO_MAX_BYTES + 1)
+    if len(data) > LOGO_MAX_BYTES:
+        raise ValueError(f"logo larger than {LOGO_MAX_BYTES} bytes")
+    return data
+
+
+def _thumbnail(data):
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGBA")
+        image.thumbnail((LOGO_THUMBNAIL_SIZE, LOGO_THUMBNAIL_SIZE))
+        out = io.BytesIO()
+        image.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def path_for(digest):
+    """Return the on-disk path of a stored thumbnail, or None for an unknown digest."""
+    if not _DIGEST.match(digest):
+        return None
+    path = os.path.join(LOGO_STORE_DIR, digest[:2], f"{digest}.png")
+    return path if os.path.exists(path) else None
+
+
+def logo_path(digest):
+    return f"/logos/{digest}"
+
+
+def absolute_url(logo, base_url):
+    """The URL a client should fetch a logo from; third-party URLs pass through."""
+    if not logo.startswith("/logos/"):
+        return logo
+    return (LOGO_PUBLIC_BASE or str(base_url).rstrip("/")) + logo
+
+
+def store(url):
+    """Download url once, store its thumbnail and return the content digest."""
+    hit, digest = _index.get(url)
+    if hit and path_for(digest):
+        return digest
+
+    thumbnail = _thumbnail(_download(url))
+    digest = hashlib.sha256(thumbnail).hexdigest()
+    directory = os.path.join(LOGO_STORE_DIR, digest[:2])
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{digest}.png")
+    if not os.path.exists(path):
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(thumbnail)
+        os.replace(tmp, path)
+    _index.set(url, digest)
+    return digest
@@ -0,0 +1,78 @@
+import time
+from langchain_core.runnables import Runnable
+import metrics
+from llm_provider import UnretriedError
+from rate_limiter import is_overload
+
+
+class MeteredLLM(Runnable):
+    """Records the latency, outcome and token usage of every call to a chat model.
+
+    Wraps the model itself, beneath the rate limiter, so each retried attempt
+    is measured on its own and the metrics stay when rate limiting is off.
+    API errors the client raised as UnretriedError are re-raised as they were.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    @property
+    def model(self):
+        return getattr(self.llm, "model", None)
+
+    @staticmethod
+    def _failed(e, start):
+        overloaded = is_overload(e)
+        analyzer = metrics.analyzer()
+        metrics.LLM_REQUEST_SECONDS.labels(analyzer=analyzer, outcome="throttled" if overloaded else "error").observe(
+            time.monotonic() - start
+        )
+        if overloaded:
+            metrics.LLM_THROTTLED.labels(analyzer=analyzer).inc()
+
+    @staticmethod
+    def _succeeded(start, message):
+        metrics.LLM_REQUEST_SECONDS.labels(analyzer=metrics.analyzer(), outcome="ok").observe(time.monotonic() - start)
+        metrics.observe_usage(message)
+
+    def invoke(self, input, config=None, **kwargs):
+        start = time.monotonic()
+        try:
+            result = self.llm.invoke(input, config, **kwargs)
+        except UnretriedError as e:
+            self._failed(e.error, start)
+            raise e.error from None
+        except Exception as e:
+            self._failed(e, start)
+            raise
+        self._succeeded(start, result)
+        return result
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        start = time.monotonic()
+        try:
+            result = await self.llm.ainvoke(input, config, **kwargs)
+        except UnretriedError as e:
+            self._failed(e.error, start)
+            raise e.error from None
+        except Exception as e:
+            self._failed(e, start)
+            raise
+        self._succeeded(start, result)
+        return result
+
+    async def astream(self, input, config=None, **kwargs):
+        start, last = time.monotonic(), None
+        try:
+            async for chunk in self.llm.astream(input, config, **kwargs):
+                if getattr(chunk, "usage_metadata", None):
+                    last = chunk
+                yield chunk
+        except UnretriedError as e:
+            self._failed(e.error, start)
+            raise e.error from None
+        except Exception as e:
+            self._failed(e, start)
+            raise
+        # Streamed usage metadata is cumulative; count the final report once.
+        self._succeeded(start, last)
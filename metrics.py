@@ -0,0 +1,98 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+
+# Prometheus metrics, served by /metrics. All durations are in seconds.
+#   PROMETHEUS_MULTIPROC_DIR   set (per prometheus_client) when running several
+#                              workers so /metrics aggregates all of them
+
+# The analyzer the current work belongs to. The response cache wrapper sets it,
+# so LLM, parsing and cache metrics deep in the call stack carry the label.
+current_analyzer = contextvars.ContextVar("analyzer", default="none")
+
+_FAST = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+_SLOW = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds", "Time to produce a response (headers, for streams)", ["method", "route", "status"],
+    buckets=_SLOW,
+)
+PROMPT_BUILD_SECONDS = Histogram(
+    "prompt_build_seconds", "Time to build one call's prompt from a registered template", ["prompt"], buckets=_FAST
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds", "Latency of one Gemini call attempt", ["analyzer", "outcome"], buckets=_SLOW
+)
+LLM_RETRIES = Counter("llm_retries_total", "Gemini calls retried after a transient error", ["analyzer"])
+LLM_THROTTLED = Counter("llm_throttled_total", "429 / quota errors returned by Gemini", ["analyzer"])
+LLM_BUDGET_WAIT_SECONDS = Counter(
+    "llm_budget_wait_seconds_total", "Time calls spent waiting for the requests/tokens per minute budget", ["analyzer"]
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported in Gemini usage metadata", ["analyzer", "kind"])
+LLM_OUTPUT_PARSE_SECONDS = Histogram(
+    "llm_output_parse_seconds", "Time to extract and validate JSON from a response", ["analyzer"], buckets=_FAST
+)
+LLM_OUTPUTS = Counter(
+    "llm_outputs_total", "Model responses by parse outcome (parsed, locally_repaired, llm_repaired, failed)",
+    ["analyzer", "outcome"],
+)
+RESPONSE_CACHE_REQUESTS = Counter("response_cache_requests_total", "Response cache lookups", ["analyzer", "result"])
+KNOWLEDGE_REQUESTS = Counter(
+    "knowledge_requests_total", "Niche knowledge store lookups; a hit can replace a whole model call", ["kind", "result"]
+)
+NICHE_LOOKUPS = Counter("niche_lookups_total", "Niche canonicalization lookups (exact, matched, new, pending)", ["result"])
+LLM_CASSETTE_REQUESTS = Counter("llm_cassette_requests_total", "Record/replay cassette lookups", ["analyzer", "result"])
+LOGO_LOOKUP_SECONDS = Histogram("logo_lookup_seconds", "Time to find and store one logo", ["result"], buckets=_SLOW)
+LOGO_CACHE_REQUESTS = Counter("logo_cache_requests_total", "Logo cache lookups", ["result"])
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_seconds", "Duration of each stage of multi-step endpoints (graph, pdf report)",
+    ["pipeline", "stage"], buckets=_SLOW,
+)
+
+
+def analyzer():
+    return current_analyzer.get()
+
+
+@contextmanager
+def analyzing(name):
+    token = current_analyzer.set(name)
+    try:
+        yield
+    finally:
+        current_analyzer.reset(token)
+
+
+@contextmanager
+def timed(histogram, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - start)
+
+
+def observe_stages(pipeline, timings):
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.labels(pipeline=pipeline, stage=stage).observe(seconds)
+
+
+def observe_usage(message):
+    """Count the tokens a Gemini response reports using, if it does."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            LLM_TOKENS.labels(analyzer=analyzer(), kind=kind.split("_")[0]).inc(usage[kind])
+
+
+def render():
+    """Return (body, content_type) for the /metrics endpoint."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
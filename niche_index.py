@@ -0,0 +1,310 @@
+import contextvars
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+import metrics
+
+# Maps each incoming market niche to a niche analyzed before when they are
+# near-duplicates ("EdTech India", "ed-tech startups", "education technology"
+# -> "edtech"), so they share cache entries, coalesced calls and knowledge.
+#   NICHE_MATCHING_ENABLED   set to 0 to key everything on the normalized text only
+#   NICHE_INDEX_PATH         SQLite file of canonical niches, default .cache/niches.sqlite3
+#   NICHE_MATCH_THRESHOLD    minimum n-gram cosine similarity for a match, default 0.85
+#   NICHE_STOPWORDS          extra comma-separated words that do not change a niche
+NICHE_MATCHING_ENABLED = os.getenv("NICHE_MATCHING_ENABLED", "1") != "0"
+NICHE_INDEX_PATH = os.getenv("NICHE_INDEX_PATH", ".cache/niches.sqlite3")
+NICHE_MATCH_THRESHOLD = float(os.getenv("NICHE_MATCH_THRESHOLD", "0.85"))
+
+# Words that qualify a niche without changing it. The prompts already ask
+# about the Indian market, so "india" is one of them.
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "in", "for", "on", "based", "startup", "startups", "company", "companies",
+    "business", "businesses", "industry", "industries", "market", "markets", "sector", "space", "segment",
+    "niche", "platform", "platforms", "solution", "solutions", "service", "services", "india", "indian",
+}
+STOPWORDS.update(w.strip().lower() for w in os.getenv("NICHE_STOPWORDS", "").split(",") if w.strip())
+
+# Spelled-out forms of the usual abbreviations, applied before tokenizing.
+SYNONYMS = {
+    "education technology": "edtech",
+    "educational technology": "edtech",
+    "financial technology": "fintech",
+    "finance technology": "fintech",
+    "health technology": "healthtech",
+    "healthcare technology": "healthtech",
+    "medical technology": "medtech",
+    "agriculture technology": "agritech",
+    "agricultural technology": "agritech",
+    "property technology": "proptech",
+    "real estate technology": "proptech",
+    "insurance technology": "insurtech",
+    "legal technology": "legaltech",
+    "human resources technology": "hrtech",
+    "climate technology": "climatetech",
+    "software as a service": "saas",
+    "artificial intelligence": "ai",
+    "machine learning": "ml",
+    "electric vehicles": "ev",
+    "electric vehicle": "ev",
+    "direct to consumer": "d2c",
+    "business to business": "b2b",
+    "e commerce": "ecommerce",
+}
+_SYNONYM = re.compile(r"\b(" + "|".join(sorted(map(re.escape, SYNONYMS), key=len, reverse=True)) + r")\b")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# MinHash LSH: SIGNATURE_SIZE hashes split into BANDS bands; niches sharing
+# any band are candidates, verified with the exact similarity. With 8 bands
+# of 4, pairs above ~0.6 Jaccard almost always collide.
+NGRAM = 3
+BANDS = 8
+ROWS = 4
+SIGNATURE_SIZE = BANDS * ROWS
+_MASKS = [random.Random(0x5EED + i).getrandbits(64) for i in range(SIGNATURE_SIZE)]
+# Candidates checked per lookup at most, so a crowded bucket stays cheap.
+MAX_CANDIDATES = 256
+
+# Words ending in "s" that are not plurals.
+_SINGULAR = {"saas", "paas", "iaas", "aas", "news", "gas", "ios", "sms", "cms", "pos", "erp", "os"}
+_NOT_PLURAL_ENDINGS = ("ss", "us", "is", "ics", "ous")
+
+
+def _stem(token):
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    # Acronyms ("saas") and words like "analytics" or "logistics" only look plural.
+    if len(token) > 3 and token.endswith("s") and not token.endswith(_NOT_PLURAL_ENDINGS) and token not in _SINGULAR:
+        return token[:-1]
+    return token
+
+
+def normalize(niche):
+    """Canonical text of a niche: lowercase, abbreviated, stopwords dropped, tokens sorted."""
+    text = " ".join(_NON_WORD.sub(" ", niche.lower()).split())
+    text = _SYNONYM.sub(lambda m: SYNONYMS[m.group(1)], text)
+    tokens = [_stem(t) for t in text.split() if t not in STOPWORDS]
+    # "ed tech" and "edtech" are the same niche; so are "ed-tech" and "edtech".
+    return " ".join(sorted(tokens or text.split()))
+
+
+def ngrams(key):
+    compact = "^" + key.replace(" ", "") + "$"
+    if len(compact) <= NGRAM:
+        return {compact}
+    return {compact[i:i + NGRAM] for i in range(len(compact) - NGRAM + 1)}
+
+
+def similarity(a, b):
+    """Cosine similarity of two n-gram sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / (len(a) * len(b)) ** 0.5
+
+
+def _hash(gram):
+    return int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def bands(grams):
+    hashes = [_hash(g) for g in grams]
+    signature = [min(h ^ mask for h in hashes) for mask in _MASKS]
+    return [
+        int.from_bytes(
+            hashlib.blake2b(struct.pack(f"<{ROWS}Q", *signature[band * ROWS:(band + 1) * ROWS]), digest_size=8,
+                            person=bytes([band])).digest(),
+            "little", signed=True,
+        )
+        for band in range(BANDS)
+    ]
+
+
+class NicheIndex:
+    """In-memory LSH index over canonical niches, persisted to SQLite.
+
+    Loaded in the background, on startup or the first lookup; the stored band
+    hashes make loading a few hundred thousand niches one table scan. Until it
+    is in, lookups only see niches added since and never wait for it.
+    """
+
+    def __init__(self, path, threshold):
+        self.path = path
+        self.threshold = threshold
+        self.exact = 0
+        self.matched = 0
+        self.new = 0
+        self.pending = 0
+        self._keys = set()
+        self._buckets = [{} for _ in range(BANDS)]
+        self._lock = threading.Lock()
+        self._db = None
+        self._loaded = False
+        self._loading = False
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS niches (key TEXT PRIMARY KEY, bands BLOB NOT NULL, created REAL NOT NULL)"
+            )
+        return self._db
+
+    @staticmethod
+    def _insert_into(keys, buckets, key, key_bands):
+        keys.add(key)
+        for bucket, band in zip(buckets, key_bands):
+            bucket.setdefault(band, []).append(key)
+
+    def _insert(self, key, key_bands):
+        self._insert_into(self._keys, self._buckets, key, key_bands)
+
+    def load(self):
+        """Load the stored niches into fresh structures, then swap them in.
+
+        Runs without holding the lock, so lookups meanwhile are not blocked.
+        """
+        with self._lock:
+            if self._loaded or self._loading:
+                return
+            self._loading = True
+        self._scan()
+
+    def _scan(self):
+        with self._lock:
+            self._connection()
+        try:
+            keys, buckets = set(), [{} for _ in range(BANDS)]
+            # A connection of its own, so add() keeps writing during the scan.
+            db = sqlite3.connect(self.path)
+            try:
+                for key, blob in db.execute("SELECT key, bands FROM niches"):
+                    self._insert_into(keys, buckets, key, struct.unpack(f"<{BANDS}q", blob))
+            finally:
+                db.close()
+            with self._lock:
+                # Niches added while loading may have missed the scan.
+                for key in self._keys - keys:
+                    self._insert_into(keys, buckets, key, bands(ngrams(key)))
+                self._keys, self._buckets = keys, buckets
+                self._loaded = True
+        finally:
+            self._loading = False
+
+    def _nearest(self, key, grams):
+        """The most similar indexed niche at or above the threshold, as (key, similarity)."""
+        candidates = set()
+        for bucket, band in zip(self._buckets, bands(grams)):
+            candidates.update(bucket.get(band, ()))
+            if len(candidates) >= MAX_CANDIDATES:
+                break
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            score = similarity(grams, ngrams(candidate))
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best, best_score
+
+    def _match(self, key):
+        if key in self._keys:
+            return key, 1.0, "exact"
+        nearest, score = self._nearest(key, ngrams(key))
+        if nearest is not None:
+            return nearest, score, "matched"
+        # Not loaded yet: fall back to the niche's own normalized key.
+        return key, 1.0, "new" if self._loaded else "pending"
+
+    def match(self, niche):
+        """Return (canonical key, similarity, how) for a niche.
+
+        how is exact, matched, new, or pending while the stored niches load.
+        """
+        with self._lock:
+            if not (self._loaded or self._loading):
+                self._loading = True
+                threading.Thread(target=self._scan, name="niche-index-load", daemon=True).start()
+            result = self._match(normalize(niche))
+            setattr(self, result[2], getattr(self, result[2]) + 1)
+        metrics.NICHE_LOOKUPS.labels(result=result[2]).inc()
+        return result
+
+    def add(self, niche):
+        """Index a niche once it has been analyzed, unless it already maps to one."""
+        with self._lock:
+            key, _, how = self._match(normalize(niche))
+            if how in ("exact", "matched"):
+                return key
+            key_bands = bands(ngrams(key))
+            self._insert(key, key_bands)
+            db = self._connection()
+            db.execute(
+                "INSERT OR IGNORE INTO niches (key, bands, created) VALUES (?, ?, ?)",
+                (key, struct.pack(f"<{BANDS}q", *key_bands), time.time()),
+            )
+            db.commit()
+        return key
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self._buckets = [{} for _ in range(BANDS)]
+            db = self._connection()
+            db.execute("DELETE FROM niches")
+            db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.exact + self.matched + self.new + self.pending
+            return {
+                "enabled": NICHE_MATCHING_ENABLED,
+                "threshold": self.threshold,
+                "loaded": self._loaded,
+                "niches": len(self._keys),
+                "exact": self.exact,
+                "matched": self.matched,
+                "new": self.new,
+                "pending": self.pending,
+                "match_rate": (self.exact + self.matched) / lookups if lookups else 0.0,
+            }
+
+
+index = NicheIndex(NICHE_INDEX_PATH, NICHE_MATCH_THRESHOLD)
+
+# Niches already matched in the current request. The coalescing, cache and
+# knowledge layers all ask for the same niche; it is looked up (and counted)
+# once per request.
+_request_matches = contextvars.ContextVar("niche_matches", default=None)
+
+
+def begin_request():
+    """Start a request scope for canonical(); returns the token for end_request()."""
+    return _request_matches.set({})
+
+
+def end_request(token):
+    _request_matches.reset(token)
+
+
+def canonical(niche):
+    """The key a niche is cached and coalesced under."""
+    if not NICHE_MATCHING_ENABLED:
+        return " ".join(niche.lower().split())
+    matches = _request_matches.get()
+    if matches is None:
+        return index.match(niche)[0]
+    key = matches.get(niche)
+    if key is None:
+        key = matches[niche] = index.match(niche)[0]
+    return key
+
+
+def remember(niche):
+    if NICHE_MATCHING_ENABLED:
+        index.add(niche)
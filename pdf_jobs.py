@@ -0,0 +1,89 @@
+import contextvars
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Report PDFs are built in the background, each job in its own directory.
+#   PDF_JOB_WORKERS   reports generated at once, default 2
+#   PDF_JOB_DIR       parent directory for per-job output, default .cache/pdf_jobs
+#   PDF_JOB_TTL       seconds a finished job and its files are kept, default 1 hour
+PDF_JOB_WORKERS = int(os.getenv("PDF_JOB_WORKERS", "2"))
+PDF_JOB_DIR = os.getenv("PDF_JOB_DIR", ".cache/pdf_jobs")
+PDF_JOB_TTL = float(os.getenv("PDF_JOB_TTL", "3600"))
+
+_executor = ThreadPoolExecutor(max_workers=PDF_JOB_WORKERS, thread_name_prefix="pdf-job")
+_jobs = {}
+_lock = threading.Lock()
+
+
+class PdfJob:
+    def __init__(self, market_niche):
+        self.id = uuid.uuid4().hex
+        self.market_niche = market_niche
+        self.status = "queued"
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.directory = os.path.join(PDF_JOB_DIR, self.id)
+        self.pdf_path = None
+        self.future = None
+        self.timings = {}
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "market_niche": self.market_niche,
+            "status": self.status,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "timings": self.timings,
+        }
+
+
+def _run(job, render):
+    job.status = "running"
+    job.started = time.time()
+    try:
+        os.makedirs(job.directory, exist_ok=True)
+        job.pdf_path = render(job.market_niche, job.directory, job.timings)
+        job.status = "done"
+    except Exception as e:
+        job.status = "failed"
+        job.error = getattr(e, "detail", None) or str(e)
+        shutil.rmtree(job.directory, ignore_errors=True)
+        raise
+    finally:
+        job.finished = time.time()
+    return job.pdf_path
+
+
+def cleanup():
+    """Forget finished jobs older than PDF_JOB_TTL and delete their files."""
+    cutoff = time.time() - PDF_JOB_TTL
+    with _lock:
+        expired = [job for job in _jobs.values() if job.finished and job.finished < cutoff]
+        for job in expired:
+            del _jobs[job.id]
+    for job in expired:
+        shutil.rmtree(job.directory, ignore_errors=True)
+
+
+def submit(render, market_niche):
+    """Queue render(market_niche, output_dir, timings) -> pdf_path and return the job immediately."""
+    cleanup()
+    job = PdfJob(market_niche)
+    with _lock:
+        _jobs[job.id] = job
+    # Run in a copy of the caller's context so the job's logs keep its request id.
+    job.future = _executor.submit(contextvars.copy_context().run, _run, job, render)
+    return job
+
+
+def get(job_id):
+    return _jobs.get(job_id)
@@ -0,0 +1,138 @@
+import base64
+import logging
+import os
+import queue
+import threading
+import time
+
+# HTML is printed to PDF by a pool of warm headless Chrome instances.
+#   PDF_BROWSER_POOL_SIZE     browsers kept alive, default 2
+#   PDF_BROWSER_MAX_RENDERS   renders before a browser is recycled, default 50
+#   PDF_BROWSER_WARM          start the browsers with the app instead of on first use, default 0
+#   PDF_RENDER_TIMEOUT        seconds to wait for the page to finish loading, default 10
+#   PDF_RENDER_SETTLE         extra seconds for the scripts of model-designed pages (the Tailwind
+#                             CDN) to style them, default 0; template pages have no scripts
+PDF_BROWSER_POOL_SIZE = int(os.getenv("PDF_BROWSER_POOL_SIZE", "2"))
+PDF_BROWSER_MAX_RENDERS = int(os.getenv("PDF_BROWSER_MAX_RENDERS", "50"))
+PDF_BROWSER_WARM = os.getenv("PDF_BROWSER_WARM", "0") == "1"
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", "10"))
+PDF_RENDER_SETTLE = float(os.getenv("PDF_RENDER_SETTLE", "0"))
+
+logger = logging.getLogger(__name__)
+
+PRINT_OPTIONS = {
+    "landscape": False,
+    "displayHeaderFooter": False,
+    "printBackground": True,
+    "preferCSSPageSize": True,
+}
+
+
+def launch_chrome():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(options=options)
+
+
+class _Browser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.renders = 0
+
+    def render(self, html, settle):
+        driver = self.driver
+        driver.get("about:blank")
+        frame_id = driver.execute_cdp_cmd("Page.getFrameTree", {})["frameTree"]["frame"]["id"]
+        driver.execute_cdp_cmd("Page.setDocumentContent", {"frameId": frame_id, "html": html})
+        deadline = time.monotonic() + PDF_RENDER_TIMEOUT
+        while driver.execute_script("return document.readyState") != "complete":
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        if settle:
+            time.sleep(settle)
+        result = driver.execute_cdp_cmd("Page.printToPDF", PRINT_OPTIONS)
+        self.renders += 1
+        return base64.b64decode(result["data"])
+
+    def close(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning("closing browser failed", extra={"fields": {"error": str(e)}})
+
+
+class BrowserPool:
+    """A fixed number of reusable browsers; each is recycled after max_renders renders."""
+
+    def __init__(self, size, max_renders, launch=launch_chrome):
+        self.size = size
+        self.max_renders = max_renders
+        self.launch = launch
+        self.launched = 0
+        self.recycled = 0
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _new_browser(self):
+        with self._lock:
+            self.launched += 1
+        return _Browser(self.launch())
+
+    def warm(self):
+        """Start browsers until the pool is full."""
+        while self._idle.qsize() < self.size:
+            self._idle.put(self._new_browser())
+
+    def render(self, html, settle=0.0):
+        """Print an HTML string to PDF and return (pdf_bytes, seconds).
+
+        settle is extra time given to the page's scripts once it has loaded.
+        """
+        with self._slots:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                browser = self._new_browser()
+            start = time.perf_counter()
+            try:
+                pdf = browser.render(html, settle)
+            except Exception:
+                # A browser that failed mid-render may be wedged; never reuse it.
+                browser.close()
+                raise
+            elapsed = time.perf_counter() - start
+            if browser.renders >= self.max_renders or self._closed:
+                browser.close()
+                with self._lock:
+                    self.recycled += 1
+            else:
+                self._idle.put(browser)
+            return pdf, elapsed
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "launched": self.launched,
+            "recycled": self.recycled,
+        }
+
+
+pool = BrowserPool(PDF_BROWSER_POOL_SIZE, PDF_BROWSER_MAX_RENDERS)
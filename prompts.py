@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import types
+import typing
+from pydantic import BaseModel
+import metrics
+
+# Every analyzer prompt is registered here once and compiled once per process.
+#   PROMPT_PRECOMPILE   compile all prompts at startup instead of on first use, default 0
+#                       (compiling imports langchain, which slows down boot)
+PROMPT_PRECOMPILE = os.getenv("PROMPT_PRECOMPILE", "0") == "1"
+
+FORMAT_INSTRUCTIONS = "Respond with a single JSON object of exactly this shape, filling in every value:\n{schema}"
+
+_SCALARS = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+_registry = {}
+_lock = threading.Lock()
+_timed_template = None
+
+
+def estimate_tokens(text):
+    """Rough token count for Gemini-style tokenizers: about four characters per token."""
+    return len(text) // 4
+
+
+def _shape(annotation):
+    origin = typing.get_origin(annotation)
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if origin in (typing.Union, types.UnionType):
+        return _shape(args[0]) if len(args) == 1 else "any"
+    if origin in (list, tuple, set):
+        return [_shape(args[0]) if args else "any"]
+    if origin is dict:
+        return {"<key>": _shape(args[1]) if len(args) > 1 else "any"}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {name: _shape(field.annotation) for name, field in annotation.model_fields.items()}
+    return _SCALARS.get(annotation, "any")
+
+
+def compact_schema(model):
+    """A one-line example shape of `model`, e.g. {"investors": [{"investor_name": "string"}]}.
+
+    A fraction of the size of the JSON Schema PydanticOutputParser emits.
+    """
+    return json.dumps(_shape(model))
+
+
+def format_instructions(model):
+    return FORMAT_INSTRUCTIONS.format(schema=compact_schema(model))
+
+
+def _template_class():
+    """PromptTemplate recording how long each call spends building its prompt.
+
+    Defined on first use, so importing this module does not import langchain.
+    """
+    global _timed_template
+    with _lock:
+        if _timed_template is None:
+            from langchain.prompts import PromptTemplate
+
+            class TimedPromptTemplate(PromptTemplate):
+                prompt_name: str = ""
+
+                def invoke(self, input, config=None):
+                    with metrics.timed(metrics.PROMPT_BUILD_SECONDS, prompt=self.prompt_name):
+                        return super().invoke(input, config)
+
+                async def ainvoke(self, input, config=None, **kwargs):
+                    with metrics.timed(metrics.PROMPT_BUILD_SECONDS, prompt=self.prompt_name):
+                        return await super().ainvoke(input, config, **kwargs)
+
+            _timed_template = TimedPromptTemplate
+        return _timed_template
+
+
+class Prompt:
+    """A registered prompt; calling it returns the compiled PromptTemplate."""
+
+    def __init__(self, name, model, template, input_variables, partial_variables):
+        self.name = name
+        self.model = model
+        self.template = template
+        self.input_variables = input_variables
+        self.partial_variables = partial_variables
+        self._compiled = None
+        self._lock = threading.Lock()
+
+    def _partials(self):
+        partials = dict(self.partial_variables)
+        # Only pay for the schema when the template actually shows it to the model.
+        if "{format_instructions}" in self.template:
+            partials["format_instructions"] = format_instructions(self.model)
+        return partials
+
+    def __call__(self):
+        if self._compiled is None:
+            with self._lock:
+                if self._compiled is None:
+                    self._compiled = _template_class()(
+                        template=self.template,
+                        input_variables=self.input_variables,
+                        partial_variables=self._partials(),
+                        prompt_name=self.name,
+                    )
+        return self._compiled
+
+    def stats(self):
+        from langchain.output_parsers import PydanticOutputParser
+
+        text = self.template.format(**{name: "" for name in self.input_variables}, **self._partials())
+        shows_schema = "{format_instructions}" in self.template
+        verbose = PydanticOutputParser(pydantic_object=self.model).get_format_instructions()
+        return {
+            "model": self.model.__name__,
+            "compiled": self._compiled is not None,
+            "input_variables": self.input_variables,
+            "template_tokens": estimate_tokens(text),
+            "schema_tokens": estimate_tokens(format_instructions(self.model)) if shows_schema else 0,
+            "verbose_schema_tokens": estimate_tokens(verbose),
+        }
+
+
+def register(name, model, template, input_variables, partial_variables=None):
+    """Register a prompt under `name` and return it; re-registering the same prompt is a no-op."""
+    prompt = Prompt(name, model, template, input_variables, partial_variables or {})
+    with _lock:
+        existing = _registry.get(name)
+        if existing is not None:
+            if (existing.model, existing.template, existing.partial_variables) != (
+                model, template, prompt.partial_variables
+            ):
+                raise ValueError(f"prompt {name!r} is already registered with a different template")
+            return existing
+        _registry[name] = prompt
+    return prompt
+
+
+def get(name):
+    return _registry[name]
+
+
+def compile_all():
+    for prompt in list(_registry.values()):
+        prompt()
+
+
+def stats():
+    return {name: prompt.stats() for name, prompt in sorted(_registry.items())}
@@ -0,0 +1,475 @@
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+import metrics
+
+# Every Gemini call is admitted by one limiter per process (or per host, with a
+# shared bucket file). Configure with:
+#   GEMINI_RATE_LIMIT_ENABLED       set to 0 to call the model unthrottled
+#   GEMINI_REQUESTS_PER_MINUTE      request budget, default 60
+#   GEMINI_TOKENS_PER_MINUTE        token budget, default 0 (unlimited)
+#   GEMINI_OUTPUT_TOKEN_ESTIMATE    tokens reserved for a response before its real size is known, default 1024
+#   GEMINI_RATE_LIMIT_PATH          SQLite file to share the budgets between workers, default unset (per process)
+#   GEMINI_INITIAL_CONCURRENCY      calls in flight at start, default 4
+#   GEMINI_MIN_CONCURRENCY          floor for the adaptive limit, default 1
+#   GEMINI_MAX_CONCURRENCY          ceiling for the adaptive limit, default 32
+#   GEMINI_LATENCY_TOLERANCE        back off once recent latency stays above this multiple of the baseline, default 2.0
+#   GEMINI_RETRY_ATTEMPTS           attempts per call on 429/5xx/timeouts, default 4
+#   GEMINI_BACKOFF_BASE             first retry waits up to this many seconds, doubling each time, default 1
+#   GEMINI_BACKOFF_MAX              longest wait between retries, default 30
+GEMINI_RATE_LIMIT_ENABLED = os.getenv("GEMINI_RATE_LIMIT_ENABLED", "1") != "0"
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60"))
+GEMINI_TOKENS_PER_MINUTE = float(os.getenv("GEMINI_TOKENS_PER_MINUTE", "0"))
+GEMINI_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("GEMINI_OUTPUT_TOKEN_ESTIMATE", "1024"))
+GEMINI_RATE_LIMIT_PATH = os.getenv("GEMINI_RATE_LIMIT_PATH", "")
+GEMINI_INITIAL_CONCURRENCY = int(os.getenv("GEMINI_INITIAL_CONCURRENCY", "4"))
+GEMINI_MIN_CONCURRENCY = int(os.getenv("GEMINI_MIN_CONCURRENCY", "1"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "32"))
+GEMINI_LATENCY_TOLERANCE = float(os.getenv("GEMINI_LATENCY_TOLERANCE", "2.0"))
+GEMINI_RETRY_ATTEMPTS = int(os.getenv("GEMINI_RETRY_ATTEMPTS", "4"))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", "1"))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", "30"))
+
+_OVERLOAD_ERRORS = {"ResourceExhausted", "TooManyRequests"}
+_TRANSIENT_ERRORS = _OVERLOAD_ERRORS | {
+    "ServiceUnavailable",
+    "InternalServerError",
+    "DeadlineExceeded",
+    "GatewayTimeout",
+    "Aborted",
+    "TimeoutError",
+    "ConnectionError",
+}
+
+
+def _status(e):
+    code = getattr(e, "code", None)
+    if isinstance(code, int):
+        return code
+    status = getattr(e, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_overload(e):
+    """A 429 / quota error: the service wants fewer calls, not just a retry."""
+    return _status(e) == 429 or any(cls.__name__ in _OVERLOAD_ERRORS for cls in type(e).__mro__)
+
+
+def is_retryable(e):
+    return (
+        is_overload(e)
+        or _status(e) in (500, 502, 503, 504)
+        or any(cls.__name__ in _TRANSIENT_ERRORS for cls in type(e).__mro__)
+    )
+
+
+def backoff(attempt, base=GEMINI_BACKOFF_BASE, cap=GEMINI_BACKOFF_MAX):
+    """Exponential backoff with full jitter for the given 1-based retry."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class TokenBucket:
+    """Refills at per_minute / 60 per second up to a minute's worth.
+
+    take() never blocks: it either takes `amount` or says how long to wait.
+    A take larger than the whole bucket is allowed once it is full, leaving
+    the bucket in debt.
+    """
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, amount):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            needed = min(amount, self.capacity)
+            if self.tokens >= needed:
+                self.tokens -= amount
+                return 0.0
+            return (needed - self.tokens) / self.rate
+
+    def give(self, amount):
+        """Return unused tokens (or charge more, with a negative amount)."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def level(self):
+        return self.tokens
+
+
+class SharedTokenBucket:
+    """A TokenBucket kept in SQLite so every worker on the host draws from the same budget."""
+
+    def __init__(self, path, name, per_minute):
+        self.path = path
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+        return self._db
+
+    def _update(self, change):
+        """Refill, apply change(tokens) -> (tokens, result) atomically across processes."""
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = db.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+                tokens = self.capacity if row is None else min(self.capacity, row[0] + (now - row[1]) * self.rate)
+                tokens, result = change(tokens)
+                db.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)", (self.name, tokens, now)
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            return result
+
+    def take(self, amount):
+        needed = min(amount, self.capacity)
+
+        def change(tokens):
+            if tokens >= needed:
+                return tokens - amount, 0.0
+            return tokens, (needed - tokens) / self.rate
+
+        return self._update(change)
+
+    def give(self, amount):
+        self._update(lambda tokens: (min(self.capacity, tokens + amount), None))
+
+    def level(self):
+        return self._update(lambda tokens: (tokens, tokens))
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on calls in flight.
+
+    Each success below the latency threshold adds 1/limit (about +1 per round
+    of calls); a 429 or sustained latency growth halves the limit, at most once
+    per baseline latency so one burst of errors counts as a single signal.
+
+    Growth is recent latency (a fast moving average) staying above the
+    baseline (a slow one) for several calls in a row. Comparing against the
+    fastest call ever seen instead would read ordinary jitter as congestion.
+
+    Latency is tracked per key (the analyzer): prompts differ several-fold
+    in response length, so one shared baseline would settle on the fastest
+    analyzer and read every slower one as congestion.
+    """
+
+    # Weights of the newest latency in the recent and baseline averages.
+    RECENT_WEIGHT = 0.2
+    BASELINE_WEIGHT = 0.02
+    # Consecutive calls over the threshold that count as congestion.
+    SUSTAINED = 5
+
+    def __init__(self, initial, minimum, maximum, tolerance):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self.decreases = 0
+        # key -> [baseline, recent, samples, calls over threshold]; latencies in seconds
+        self.latencies = {}
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        # (loop, future) of every coroutine waiting for a slot
+        self._waiters = []
+
+    def try_acquire(self):
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait(0.1)
+            self.in_flight += 1
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                await waiter
+            finally:
+                with self._cond:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+
+    @staticmethod
+    def _wake(waiter):
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def _notify(self):
+        """Wake every waiter, sync or async, to retry for a slot. Called holding _cond."""
+        self._cond.notify_all()
+        waiters, self._waiters = self._waiters, []
+        for loop, waiter in waiters:
+            # release() may run on another thread (sync calls) or another loop.
+            loop.call_soon_threadsafe(self._wake, waiter)
+
+    def _congested(self, key, latency):
+        state = self.latencies.get(key)
+        if state is None:
+            self.latencies[key] = [latency, latency, 1, 0]
+            return False
+        baseline, recent, samples, over = state
+        samples += 1
+        recent += self.RECENT_WEIGHT * (latency - recent)
+        # A plain mean over the first calls, so one early outlier does not
+        # set the baseline for the next hundred.
+        baseline += max(1 / samples, self.BASELINE_WEIGHT) * (latency - baseline)
+        over = over + 1 if recent > self.tolerance * baseline else 0
+        state[:] = baseline, recent, samples, over
+        return over >= self.SUSTAINED
+
+    def _spacing(self):
+        """Minimum time between two decreases: the fastest baseline seen, or a second."""
+        return min((state[0] for state in self.latencies.values()), default=1.0)
+
+    def release(self, latency=None, overloaded=False, key=None):
+        with self._cond:
+            self.in_flight -= 1
+            congested = overloaded or (latency is not None and self._congested(key, latency))
+            now = time.monotonic()
+            if congested:
+                if now - self._last_decrease > self._spacing():
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+                    self.decreases += 1
+            elif latency is not None:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._notify()
+
+
+class RateLimiter:
+    def __init__(self, requests, tokens, concurrency, attempts):
+        self.requests = requests
+        self.tokens = tokens
+        self.concurrency = concurrency
+        self.attempts = attempts
+        self.calls = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+        # Shared buckets wait on a SQLite lock; async callers take them off the loop.
+        self._blocking = any(isinstance(bucket, SharedTokenBucket) for bucket in (requests, tokens))
+
+    async def _off_loop(self, fn, *args):
+        if self._blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _reserve(self, estimate):
+        """Take a request and `estimate` tokens, or return how long to wait."""
+        wait = self.requests.take(1) if self.requests else 0.0
+        if wait or not self.tokens:
+            return wait
+        wait = self.tokens.take(estimate)
+        if wait and self.requests:
+            self.requests.give(1)
+        return wait
+
+    def _count(self, **changes):
+        with self._lock:
+            for name, amount in changes.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def _waited(self, seconds):
+        self._count(waited=seconds)
+        metrics.LLM_BUDGET_WAIT_SECONDS.labels(analyzer=metrics.analyzer()).inc(seconds)
+
+    def _admit(self, estimate):
+        self.concurrency.acquire()
+        try:
+            while True:
+                wait = self._reserve(estimate)
+                if not wait:
+                    return
+                self._waited(wait)
+                time.sleep(wait)
+        except BaseException:
+            # A failing shared bucket or an interrupt must not leak the slot.
+            self.concurrency.release()
+            raise
+
+    async def _aadmit(self, estimate):
+        await self.concurrency.aacquire()
+        try:
+            while True:
+                wait = await self._off_loop(self._reserve, estimate)
+                if not wait:
+                    return
+                self._waited(wait)
+                await asyncio.sleep(wait)
+        except BaseException:
+            # Cancelled while waiting for budget, e.g. an SSE client that disconnected.
+            self.concurrency.release()
+            raise
+
+    def _settle(self, estimate, used):
+        if self.tokens and used is not None:
+            self.tokens.give(estimate - used)
+
+    def _failed(self, e, estimate, attempt):
+        """Record a failed attempt; return the backoff delay, or None to give up.
+
+        Latency and 429 metrics are recorded beneath the limiter (MeteredLLM).
+        """
+        overloaded = is_overload(e)
+        self.concurrency.release(overloaded=overloaded)
+        if self.tokens:
+            self.tokens.give(estimate)
+        self._count(throttled=int(overloaded))
+        if attempt >= self.attempts or not is_retryable(e):
+            self._count(failed=1)
+            return None
+        self._count(retries=1)
+        metrics.LLM_RETRIES.labels(analyzer=metrics.analyzer()).inc()
+        return backoff(attempt)
+
+    def _succeeded(self, start, estimate, used):
+        latency = time.monotonic() - start
+        self.concurrency.release(latency=latency, key=metrics.analyzer())
+        self._settle(estimate, used)
+        self._count(succeeded=1)
+
+    def call(self, fn, estimate=0, usage=lambda result: None):
+        """Run fn() once admitted, retrying transient failures with backoff."""
+        self._count(calls=1)
+        for attempt in range(1, self.attempts + 1):
+            self._admit(estimate)
+            start = time.monotonic()
+            try:
+                result = fn()
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    self.concurrency.release()
+                    raise
+                delay = self._failed(e, estimate, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self._succeeded(start, estimate, usage(result))
+            return result
+
+    async def acall(self, fn, estimate=0, usage=lambda result: None):
+        self._count(calls=1)
+        for attempt in range(1, self.attempts + 1):
+            await self._aadmit(estimate)
+            start = time.monotonic()
+            try:
+                result = await fn()
+            except BaseException as e:
+                # Cancelled: give the slot back without counting it against the service.
+                if not isinstance(e, Exception):
+                    self.concurrency.release()
+                    raise
+                delay = await self._off_loop(self._failed, e, estimate, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            await self._off_loop(self._succeeded, start, estimate, usage(result))
+            return result
+
+    async def astream(self, fn, estimate=0, usage=lambda chunk: None):
+        """Iterate fn()'s async stream; only a stream that fails before its first chunk is retried."""
+        self._count(calls=1)
+        for attempt in range(1, self.attempts + 1):
+            await self._aadmit(estimate)
+            start = time.monotonic()
+            started, used = False, None
+            try:
+                async for chunk in fn():
+                    started = True
+                    used = usage(chunk) or used
+                    yield chunk
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    self.concurrency.release()
+                    raise
+                if started:
+                    self.concurrency.release()
+                    self._count(failed=1)
+                    raise
+                delay = await self._off_loop(self._failed, e, estimate, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            await self._off_loop(self._succeeded, start, estimate, used)
+            return
+
+    def stats(self):
+        return {
+            "enabled": GEMINI_RATE_LIMIT_ENABLED,
+            "calls": self.calls,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "seconds_waited_for_budget": round(self.waited, 3),
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "concurrency_decreases": self.concurrency.decreases,
+            "requests_available": self.requests.level() if self.requests else None,
+            "tokens_available": self.tokens.level() if self.tokens else None,
+        }
+
+
+def _bucket(name, per_minute):
+    if per_minute <= 0:
+        return None
+    if GEMINI_RATE_LIMIT_PATH:
+        return SharedTokenBucket(GEMINI_RATE_LIMIT_PATH, name, per_minute)
+    return TokenBucket(per_minute)
+
+
+limiter = RateLimiter(
+    _bucket("requests", GEMINI_REQUESTS_PER_MINUTE),
+    _bucket("tokens", GEMINI_TOKENS_PER_MINUTE),
+    AdaptiveConcurrency(
+        GEMINI_INITIAL_CONCURRENCY, GEMINI_MIN_CONCURRENCY, GEMINI_MAX_CONCURRENCY, GEMINI_LATENCY_TOLERANCE
+    ),
+    GEMINI_RETRY_ATTEMPTS,
+)
@@ -0,0 +1,84 @@
+import html
+from pydantic import BaseModel
+
+SECTION_ICONS = {
+    "executive_summary": "📌",
+    "product_feasibility_analysis": "🧪",
+    "reliability_analysis": "🛡️",
+    "break_even_analysis": "💰",
+    "conclusion_recommendations": "✅",
+    "appendices": "📎",
+}
+
+STYLE = """
+body { margin: 0; background: linear-gradient(180deg, #f8fafc 0%, #eef2ff 100%); color: #1f2937;
+       font-family: -apple-system, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; line-height: 1.6; }
+main { max-width: 820px; margin: 0 auto; padding: 48px 32px; }
+header { text-align: center; margin-bottom: 40px; }
+header h1 { font-size: 2.2em; margin: 0 0 8px; color: #312e81; }
+header p { margin: 0; color: #6b7280; }
+section { background: #ffffff; border-radius: 14px; box-shadow: 0 4px 18px rgba(49, 46, 129, 0.08);
+          padding: 24px 28px; margin-bottom: 24px; page-break-inside: avoid; }
+h2 { margin: 0 0 16px; font-size: 1.45em; color: #3730a3; border-bottom: 2px solid #e0e7ff; padding-bottom: 8px; }
+h3 { margin: 20px 0 8px; font-size: 1.15em; color: #4338ca; }
+h4 { margin: 14px 0 4px; font-size: 0.95em; color: #4b5563; text-transform: uppercase; letter-spacing: 0.04em; }
+p { margin: 0 0 10px; }
+ul { margin: 0 0 10px; padding-left: 20px; }
+"""
+
+
+def _title(name):
+    return name.replace("_", " ").strip().title()
+
+
+def _fields(model):
+    if model is None:
+        return {}
+    fields = getattr(model, "model_fields", None) or model.__fields__
+    return {name: getattr(field, "annotation", None) or getattr(field, "outer_type_", None) for name, field in fields.items()}
+
+
+def _ordered(data, model):
+    fields = _fields(model)
+    keys = [k for k in fields if k in data] + [k for k in data if k not in fields]
+    for key in keys:
+        sub = fields.get(key)
+        yield key, data[key], sub if isinstance(sub, type) and issubclass(sub, BaseModel) else None
+
+
+def _text(value):
+    paragraphs = [p.strip() for p in str(value).split("\n") if p.strip()]
+    return "".join(f"<p>{html.escape(p)}</p>" for p in paragraphs)
+
+
+def _value(value, model, depth):
+    if isinstance(value, dict):
+        return "".join(_block(key, sub, sub_model, depth) for key, sub, sub_model in _ordered(value, model))
+    if isinstance(value, list):
+        return "<ul>" + "".join(f"<li>{_value(item, model, depth + 1)}</li>" for item in value) + "</ul>"
+    return _text(value)
+
+
+def _block(key, value, model, depth):
+    tag = "h3" if depth == 0 else "h4"
+    return f"<{tag}>{html.escape(_title(key))}</{tag}>{_value(value, model, depth + 1)}"
+
+
+def render_report(report, model, title, subtitle=""):
+    """Render a report dict as a self-contained, styled HTML document.
+
+    Sections follow the field order of `model` (e.g. ComprehensiveReport);
+    keys the model does not know are appended in the order they arrive.
+    """
+    sections = []
+    for key, value, sub_model in _ordered(report, model):
+        icon = SECTION_ICONS.get(key, "")
+        heading = html.escape(f"{icon} {_title(key)}".strip())
+        sections.append(f"<section><h2>{heading}</h2>{_value(value, sub_model, 0)}</section>")
+    return (
+        "<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title><style>{STYLE}</style></head><body><main>"
+        f"<header><h1>{html.escape(title)}</h1><p>{html.escape(subtitle)}</p></header>"
+        + "".join(sections)
+        + "</main></body></html>"
+    )
@@ -0,0 +1,297 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.encoders import jsonable_encoder
+import llm_provider
+import metrics
+import niche_index
+
+# Analyzer responses are deterministic (temperature 0), so identical requests
+# are served from an in-memory LRU backed by SQLite. Configure with:
+#   RESPONSE_CACHE_ENABLED         set to 0 to bypass the cache entirely
+#   RESPONSE_CACHE_PATH            SQLite file, default .cache/responses.sqlite3
+#   RESPONSE_CACHE_TTL             entry lifetime in seconds, default 7 days
+#   RESPONSE_CACHE_MEMORY_ENTRIES  size of the in-memory LRU front
+#   RESPONSE_CACHE_DISK_ENTRIES    max rows kept on disk before eviction
+#   RESPONSE_CACHE_EVICT_EVERY     writes between sweeps for expired rows, default 256
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") != "0"
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", ".cache/responses.sqlite3")
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+RESPONSE_CACHE_MEMORY_ENTRIES = int(os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", "1024"))
+RESPONSE_CACHE_DISK_ENTRIES = int(os.getenv("RESPONSE_CACHE_DISK_ENTRIES", "100000"))
+RESPONSE_CACHE_EVICT_EVERY = int(os.getenv("RESPONSE_CACHE_EVICT_EVERY", "256"))
+
+
+class ResponseCache:
+    """An in-memory LRU in front of a size-capped SQLite table.
+
+    The async methods serve memory hits inline and do all SQLite work on the
+    cache's own thread, so a slow disk never stalls the event loop.
+    """
+
+    def __init__(self, path, ttl, max_memory_entries, max_disk_entries, evict_every=RESPONSE_CACHE_EVICT_EVERY):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.evict_every = evict_every
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        # Rows on disk as of the last sweep plus the writes since; other
+        # workers sharing the file make it drift until the next sweep.
+        self._rows = 0
+        self._writes = 0
+        self._executor = None
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+            self._rows = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return self._db
+
+    def _remember(self, key, value, created):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _memory_get(self, key, now):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return entry[0]
+            self._memory.pop(key, None)
+            return None
+
+    def get(self, key):
+        """Return (hit, value) for key, honouring the TTL."""
+        now = time.time()
+        payload = self._memory_get(key, now)
+        if payload is not None:
+            return True, json.loads(payload)
+        return self._disk_get(key, now)
+
+    def _disk_get(self, key, now):
+        with self._lock:
+            db = self._connection()
+            row = db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] >= self.ttl:
+                if row is not None:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    db.commit()
+                    self._rows -= 1
+                self.misses += 1
+                return False, None
+            db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            db.commit()
+            self._remember(key, row[0], row[1])
+            self.hits += 1
+            return True, json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        payload = json.dumps(jsonable_encoder(value))
+        with self._lock:
+            self._remember(key, payload, now)
+        self._disk_set(key, payload, now)
+
+    def _disk_set(self, key, payload, now):
+        with self._lock:
+            db = self._connection()
+            existed = db.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            self._rows += existed is None
+            self._writes += 1
+            self._evict(db, now)
+            db.commit()
+
+    def _evict(self, db, now):
+        """Drop expired rows every evict_every writes, and the least recently used once over capacity.
+
+        Both deletes walk an index, so a write never scans the whole table.
+        """
+        if self._writes % self.evict_every == 0:
+            self.evictions += db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,)).rowcount
+            self._rows = db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = self._rows - self.max_disk_entries
+        if overflow > 0:
+            removed = db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                (overflow,),
+            ).rowcount
+            self._rows -= removed
+            self.evictions += removed
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(1, thread_name_prefix="response-cache")
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def aget(self, key):
+        now = time.time()
+        payload = self._memory_get(key, now)
+        if payload is not None:
+            return True, json.loads(payload)
+        return await self._run(self._disk_get, key, now)
+
+    async def aset(self, key, value):
+        now = time.time()
+        payload = json.dumps(jsonable_encoder(value))
+        with self._lock:
+            self._remember(key, payload, now)
+        await self._run(self._disk_set, key, payload, now)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._connection()
+            db.execute("DELETE FROM responses")
+            db.commit()
+            self._rows = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": RESPONSE_CACHE_ENABLED,
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+            }
+
+
+cache = ResponseCache(
+    RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MEMORY_ENTRIES, RESPONSE_CACHE_DISK_ENTRIES
+)
+
+
+def normalize_niche(value):
+    return re.sub(r"\s+", " ", value).strip().lower()
+
+
+def normalize_value(value):
+    if isinstance(value, str):
+        return normalize_niche(value)
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+    return value
+
+
+# Analyzer arguments holding a market niche; near-duplicate niches share a key.
+NICHE_ARGUMENTS = ("market_niche", "market_description", "startupMarket")
+
+
+def key_arguments(arguments):
+    """Values of an analyzer's named arguments for a key, niches in canonical form."""
+    return [
+        niche_index.canonical(value) if name in NICHE_ARGUMENTS and isinstance(value, str) else value
+        for name, value in arguments.items()
+    ]
+
+
+def remember_niches(arguments):
+    """Make the niches of a completed analysis canonical for later near-duplicates."""
+    for name, value in arguments.items():
+        if name in NICHE_ARGUMENTS and isinstance(value, str):
+            niche_index.remember(value)
+
+
+@functools.lru_cache(maxsize=None)
+def _template_hash(build_prompt):
+    prompt = build_prompt()
+    text = prompt.template + json.dumps(prompt.partial_variables, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def make_key(analyzer, build_prompt, args):
+    material = [analyzer, _template_hash(build_prompt), llm_provider.GEMINI_MODEL, normalize_value(list(args))]
+    return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def cached(analyzer, build_prompt):
+    """Cache an analyzer's result keyed on its prompt template, model and arguments.
+
+    Works on both the sync and async variants; they share entries when given
+    the same analyzer name.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def arguments(args, kwargs):
+            return signature.bind(*args, **kwargs).arguments
+
+        def counted(hit):
+            metrics.RESPONSE_CACHE_REQUESTS.labels(analyzer=analyzer, result="hit" if hit else "miss").inc()
+            return hit
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with metrics.analyzing(analyzer):
+                    if not RESPONSE_CACHE_ENABLED:
+                        return await func(*args, **kwargs)
+                    named = arguments(args, kwargs)
+                    key = make_key(analyzer, build_prompt, key_arguments(named))
+                    hit, value = await cache.aget(key)
+                    if counted(hit):
+                        return value
+                    value = await func(*args, **kwargs)
+                    await cache.aset(key, value)
+                    await asyncio.to_thread(remember_niches, named)
+                    return value
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.analyzing(analyzer):
+                if not RESPONSE_CACHE_ENABLED:
+                    return func(*args, **kwargs)
+                named = arguments(args, kwargs)
+                key = make_key(analyzer, build_prompt, key_arguments(named))
+                hit, value = cache.get(key)
+                if counted(hit):
+                    return value
+                value = func(*args, **kwargs)
+                cache.set(key, value)
+                remember_niches(named)
+                return value
+
+        return wrapper
+
+    return decorator
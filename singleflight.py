@@ -0,0 +1,96 @@
+import asyncio
+import functools
+import inspect
+import json
+import threading
+from response_cache import key_arguments, normalize_value
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key; concurrent callers share its result."""
+
+    def __init__(self):
+        self.leaders = 0
+        self.shared = 0
+        self._tasks = {}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    async def do(self, key, fn):
+        task = self._tasks.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.shared += 1
+        # Shield so one waiter disconnecting does not cancel the call for the rest.
+        return await asyncio.shield(task)
+
+    def do_sync(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self):
+        return {
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "in_flight": len(self._tasks) + len(self._calls),
+        }
+
+
+group = SingleFlight()
+
+
+def coalesced(analyzer):
+    """Share one in-flight call between concurrent identical analyzer requests."""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def key_for(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            return json.dumps([analyzer, normalize_value(key_arguments(bound.arguments))], sort_keys=True, default=str)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await group.do(key_for(args, kwargs), lambda: func(*args, **kwargs))
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return group.do_sync(key_for(args, kwargs), lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import logging
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+import metrics
+from response_cache import RESPONSE_CACHE_ENABLED, cache, key_arguments, make_key, remember_niches
+
+logger = logging.getLogger(__name__)
+
+
+class FieldScanner:
+    """Incrementally find completed top-level fields of a JSON object being streamed.
+
+    Text before the opening brace (e.g. a ```json fence) is skipped. A field is
+    complete once the comma or closing brace that follows its value arrives.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._field_start = None
+
+    def feed(self, text):
+        self.buffer += text
+        fields = []
+        while self._pos < len(self.buffer) and not self.done:
+            ch = self.buffer[self._pos]
+            if self._field_start is None:
+                if ch == "{":
+                    self._depth = 1
+                    self._field_start = self._pos + 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 1:
+                    fields.extend(self._emit(self._pos))
+                    self.done = True
+                self._depth -= 1
+            elif ch == "," and self._depth == 1:
+                fields.extend(self._emit(self._pos))
+                self._field_start = self._pos + 1
+            self._pos += 1
+        return fields
+
+    def _emit(self, end):
+        text = self.buffer[self._field_start:end].strip()
+        if not text:
+            return []
+        try:
+            return list(json.loads("{" + text + "}").items())
+        except ValueError:
+            return []
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def _stream_events(analyzer, build_prompt, llm, inputs, model, context):
+    metrics.current_analyzer.set(analyzer)
+    key = make_key(analyzer, build_prompt, key_arguments(inputs)) if RESPONSE_CACHE_ENABLED else None
+    if key is not None:
+        hit, value = await cache.aget(key)
+        metrics.RESPONSE_CACHE_REQUESTS.labels(analyzer=analyzer, result="hit" if hit else "miss").inc()
+        if hit:
+            for name, field in value.items():
+                yield sse("field", {"name": name, "value": field})
+            yield sse("done", value)
+            return
+
+    scanner = FieldScanner()
+    fields = {}
+    try:
+        async for chunk in (build_prompt() | llm).astream({**inputs, **context}):
+            for name, field in scanner.feed(chunk.content):
+                fields[name] = field
+                yield sse("field", {"name": name, "value": field})
+        result = jsonable_encoder(model(**fields))
+    except Exception as e:
+        logger.warning("streaming analysis failed", extra={"fields": {"error": str(e), "fields_received": len(fields)}})
+        yield sse("error", {"detail": str(e), "partial": fields})
+        return
+
+    if key is not None:
+        await cache.aset(key, result)
+        await asyncio.to_thread(remember_niches, inputs)
+    yield sse("done", result)
+
+
+def stream_analysis(analyzer, build_prompt, llm, inputs, model, context=None):
+    """Server-Sent Events response emitting each field of `model` as soon as it is complete.
+
+    Emits `field` events ({"name", "value"}), then a `done` event with the full
+    validated object, or an `error` event with whatever fields had arrived.
+    Results share the response cache with the non-streaming analyzer, keyed
+    on `inputs`; `context` holds extra prompt variables left out of the key.
+    """
+    return StreamingResponse(
+        _stream_events(analyzer, build_prompt, llm, inputs, model, context or {}),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,94 @@
+import collections
+import contextvars
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import metrics
+
+# One JSON object per log line, tagged with the request id and analyzer.
+#   LOG_LEVEL                 default INFO
+#   LOG_FORMAT                "json" (default) or "text" for local development
+#   RAW_RESPONSE_SAMPLE_RATE  fraction of successful model responses logged in full, default 0.01
+#   RAW_RESPONSE_MAX_CHARS    raw responses are cut to this many characters, default 2000
+#   RAW_RESPONSE_BUFFER       failed responses kept in memory for /debug/llm_failures, default 50
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+RAW_RESPONSE_SAMPLE_RATE = float(os.getenv("RAW_RESPONSE_SAMPLE_RATE", "0.01"))
+RAW_RESPONSE_MAX_CHARS = int(os.getenv("RAW_RESPONSE_MAX_CHARS", "2000"))
+RAW_RESPONSE_BUFFER = int(os.getenv("RAW_RESPONSE_BUFFER", "50"))
+
+request_id = contextvars.ContextVar("request_id", default="-")
+
+_failures = collections.deque(maxlen=RAW_RESPONSE_BUFFER)
+_failures_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": request_id.get(),
+            "analyzer": metrics.analyzer(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure():
+    """Send all logging to stdout through one handler; safe to call more than once."""
+    handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(LOG_LEVEL)
+
+
+def truncate(text, limit=RAW_RESPONSE_MAX_CHARS):
+    text = str(text)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+def raw_response(logger, content, error=None, stage="parse"):
+    """Capture a raw model response: every failure, and a sample of successes.
+
+    Failures also go into an in-memory ring buffer served by /debug/llm_failures.
+    """
+    if error is None:
+        if random.random() < RAW_RESPONSE_SAMPLE_RATE:
+            logger.info(
+                "sampled model response",
+                extra={"fields": {"chars": len(content), "raw": truncate(content)}},
+            )
+        return
+    entry = {
+        "at": time.time(),
+        "request_id": request_id.get(),
+        "analyzer": metrics.analyzer(),
+        "stage": stage,
+        "error": truncate(error, 500),
+        "chars": len(content),
+        "raw": truncate(content),
+    }
+    with _failures_lock:
+        _failures.append(entry)
+    logger.warning("model response failed to parse", extra={"fields": {k: entry[k] for k in ("stage", "error", "chars", "raw")}})
+
+
+def recent_failures():
+    """Most recent first."""
+    with _failures_lock:
+        return list(reversed(_failures))
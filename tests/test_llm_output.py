@@ -0,0 +1,74 @@
+import pytest
+from typing import List
+from pydantic import BaseModel
+from llm_output import OutputParseError, extract_fenced, extract_json, validate
+
+
+class Feature(BaseModel):
+    feature: str
+
+
+class Features(BaseModel):
+    lists: List[Feature]
+
+
+def test_fenced_json_is_extracted_as_is():
+    content = 'Here you go:\n```json\n{"a": 1, "b": [1, 2]}\n```\nAnything else?'
+    assert extract_json(content) == ({"a": 1, "b": [1, 2]}, False)
+
+
+def test_unfenced_json_is_found_in_surrounding_text():
+    assert extract_json('The answer is {"a": "x"} as requested.') == ({"a": "x"}, False)
+
+
+def test_brackets_inside_strings_do_not_end_the_value():
+    assert extract_json('{"a": "}]{[", "b": "\\"}"} trailing }') == ({"a": "}]{[", "b": '"}'}, False)
+
+
+def test_trailing_commas_are_repaired():
+    assert extract_json('{"a": [1, 2,], "b": 3,}') == ({"a": [1, 2], "b": 3}, True)
+
+
+def test_output_cut_off_in_a_string_is_closed():
+    assert extract_json('```json\n{"a": "x", "b": ["y", "z') == ({"a": "x", "b": ["y", "z"]}, True)
+
+
+def test_output_cut_off_after_a_key_drops_the_key():
+    assert extract_json('{"a": 1, "b": {"c": 2}, "d":') == ({"a": 1, "b": {"c": 2}}, True)
+
+
+def test_output_cut_off_after_a_comma_drops_the_comma():
+    assert extract_json('[{"a": 1}, {"a": 2},') == ([{"a": 1}, {"a": 2}], True)
+
+
+def test_response_without_json_raises():
+    with pytest.raises(OutputParseError):
+        extract_json("Sorry, I cannot help with that.")
+
+
+def test_bare_list_is_coerced_into_a_single_list_schema():
+    output, repaired = validate('[{"feature": "speed"}, {"feature": "price"}]', Features)
+    assert output == {"lists": [{"feature": "speed"}, {"feature": "price"}]}
+    assert not repaired
+
+
+def test_schema_mismatch_raises():
+    with pytest.raises(OutputParseError):
+        validate('{"lists": [{"name": "speed"}]}', Features)
+
+
+def test_fenced_block_of_the_language_is_preferred():
+    content = "```css\nbody {}\n```\n```html\n<p>hi</p>\n```"
+    assert extract_fenced(content, "html") == "<p>hi</p>"
+
+
+def test_any_fenced_block_is_used_without_the_language():
+    assert extract_fenced("Sure:\n```\n<p>hi</p>\n```", "html") == "<p>hi</p>"
+
+
+def test_unfenced_response_is_used_whole():
+    assert extract_fenced("  <p>hi</p>\n", "html") == "<p>hi</p>"
+
+
+def test_unclosed_fence_runs_to_the_end():
+    assert extract_fenced("```HTML\n<p>hi</p><p>cut", "html") == "<p>hi</p><p>cut"
@@ -0,0 +1,61 @@
+import niche_index
+from niche_index import NicheIndex, normalize
+
+
+def test_normalize_drops_qualifiers_and_spells_out_abbreviations():
+    assert normalize("Education Technology startups in India") == "edtech"
+    assert normalize("EdTech India") == "edtech"
+    assert normalize("Vegan bakeries in Berlin") == normalize("vegan bakery berlin")
+
+
+def test_normalize_keeps_words_that_only_look_plural():
+    assert normalize("SaaS") == "saas"
+    assert normalize("analytics tools") == "analytics tool"
+    assert normalize("logistics") == "logistics"
+
+
+def _index(tmp_path):
+    index = NicheIndex(str(tmp_path / "niches.sqlite3"), 0.85)
+    index.load()
+    return index
+
+
+def test_match_finds_exact_and_near_duplicate_niches(tmp_path):
+    index = _index(tmp_path)
+    assert index.add("EdTech India") == "edtech"
+    assert index.match("education technology startups") == ("edtech", 1.0, "exact")
+    key, score, how = index.match("ed-tech")
+    assert (key, how) == ("edtech", "matched") and score >= 0.85
+    assert index.match("cloud kitchens") == ("cloud kitchen", 1.0, "new")
+    assert index.stats()["exact"] == 1 and index.stats()["matched"] == 1 and index.stats()["new"] == 1
+
+
+def test_stored_niches_are_matched_after_loading(tmp_path):
+    _index(tmp_path).add("ed tech")
+    index = NicheIndex(str(tmp_path / "niches.sqlite3"), 0.85)
+    index.load()
+    assert index.match("EdTech")[0] == "ed tech"
+
+
+def test_lookups_before_the_load_fall_back_to_the_normalized_niche(tmp_path):
+    _index(tmp_path).add("ed tech")
+    index = NicheIndex(str(tmp_path / "niches.sqlite3"), 0.85)
+    index._scan = lambda: None  # the background load never finishes
+    assert index.match("EdTech India") == ("edtech", 1.0, "pending")
+    index.add("cloud kitchens")
+    NicheIndex._scan(index)
+    assert index.match("EdTech")[2] == "matched"
+    assert index.match("cloud kitchen")[2] == "exact"
+
+
+def test_canonical_looks_a_niche_up_once_per_request(tmp_path, monkeypatch):
+    index = _index(tmp_path)
+    monkeypatch.setattr(niche_index, "index", index)
+    token = niche_index.begin_request()
+    try:
+        for _ in range(3):
+            assert niche_index.canonical("EdTech India") == "edtech"
+    finally:
+        niche_index.end_request(token)
+    niche_index.canonical("EdTech India")
+    assert index.stats()["new"] == 2
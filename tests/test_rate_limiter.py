@@ -0,0 +1,129 @@
+import asyncio
+import random
+import pytest
+from rate_limiter import AdaptiveConcurrency, RateLimiter, SharedTokenBucket, TokenBucket
+
+
+def _limiter(requests_per_minute, concurrency=1):
+    return RateLimiter(
+        TokenBucket(requests_per_minute), None, AdaptiveConcurrency(concurrency, 1, concurrency, 2.0), 1
+    )
+
+
+async def _ok():
+    return "ok"
+
+
+def test_cancel_while_waiting_for_budget_releases_the_slot():
+    limiter = _limiter(1)
+
+    async def scenario():
+        assert await limiter.acall(_ok) == "ok"  # uses up the 1 rpm budget
+        waiting = asyncio.ensure_future(limiter.acall(_ok))
+        await asyncio.sleep(0.05)
+        assert limiter.concurrency.in_flight == 1
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert limiter.concurrency.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancel_while_streaming_waits_for_budget_releases_the_slot():
+    limiter = _limiter(1)
+
+    async def chunks():
+        yield "chunk"
+
+    async def consume():
+        return [chunk async for chunk in limiter.astream(chunks)]
+
+    async def scenario():
+        assert await consume() == ["chunk"]
+        waiting = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert limiter.concurrency.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_failing_bucket_releases_the_slot():
+    limiter = _limiter(60)
+
+    def broken(amount):
+        raise OSError("bucket unavailable")
+
+    limiter.requests.take = broken
+    with pytest.raises(OSError):
+        limiter.call(lambda: "ok")
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_waiter_is_woken_by_release():
+    concurrency = AdaptiveConcurrency(1, 1, 1, 2.0)
+
+    async def scenario():
+        await concurrency.aacquire()
+        waiting = asyncio.ensure_future(concurrency.aacquire())
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        concurrency.release()
+        await asyncio.wait_for(waiting, 1)
+        assert concurrency.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_is_forgotten():
+    concurrency = AdaptiveConcurrency(1, 1, 1, 2.0)
+
+    async def scenario():
+        await concurrency.aacquire()
+        waiting = asyncio.ensure_future(concurrency.aacquire())
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert concurrency._waiters == []
+        concurrency.release()
+        assert concurrency.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def _serve(concurrency, latencies):
+    for latency in latencies:
+        assert concurrency.try_acquire()
+        concurrency.release(latency=latency, key="analyzer")
+
+
+def test_latency_jitter_does_not_shrink_the_limit():
+    concurrency = AdaptiveConcurrency(4, 1, 32, 2.0)
+    rng = random.Random(7)
+    _serve(concurrency, (0.1 * rng.lognormvariate(0, 0.3) for _ in range(20000)))
+    assert concurrency.decreases == 0
+    assert concurrency.limit == 32
+
+
+def test_sustained_latency_growth_halves_the_limit():
+    concurrency = AdaptiveConcurrency(16, 1, 32, 2.0)
+    _serve(concurrency, [0.1] * 200)
+    _serve(concurrency, [0.1, 0.5] * 2)
+    assert concurrency.decreases == 0
+    _serve(concurrency, [0.5] * 20)
+    assert concurrency.decreases == 1
+    assert concurrency.limit < 32
+
+
+def test_shared_bucket_admits_async_calls(tmp_path):
+    limiter = RateLimiter(
+        SharedTokenBucket(str(tmp_path / "buckets.sqlite3"), "requests", 60), None,
+        AdaptiveConcurrency(1, 1, 1, 2.0), 1,
+    )
+    assert asyncio.run(limiter.acall(_ok)) == "ok"
+    assert limiter.concurrency.in_flight == 0
+    assert limiter.requests.level() == pytest.approx(59, abs=0.1)
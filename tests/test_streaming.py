@@ -0,0 +1,39 @@
+from streaming import FieldScanner
+
+
+def _feed_in_pieces(text, size):
+    scanner, fields = FieldScanner(), []
+    for i in range(0, len(text), size):
+        fields.append(scanner.feed(text[i:i + size]))
+    return scanner, fields
+
+
+def test_fields_are_emitted_once_their_value_is_complete():
+    scanner = FieldScanner()
+    assert scanner.feed('```json\n{"name": "Ac') == []
+    assert scanner.feed('me", "score"') == [("name", "Acme")]
+    assert scanner.feed(": 4") == []
+    assert scanner.feed("}\n```") == [("score", 4)]
+    assert scanner.done
+
+
+def test_commas_and_braces_inside_values_do_not_split_fields():
+    text = '{"a": "x, }y", "b": {"c": [1, 2], "d": "]"}, "e": [{"f": "\\"},"}]}'
+    _, pieces = _feed_in_pieces(text, 1)
+    assert [field for piece in pieces for field in piece] == [
+        ("a", "x, }y"), ("b", {"c": [1, 2], "d": "]"}), ("e", [{"f": '"},'}]),
+    ]
+
+
+def test_chunking_does_not_change_the_fields():
+    text = '{"overview": "a b c", "steps": ["one", "two"], "cost": 1.5}'
+    expected = [("overview", "a b c"), ("steps", ["one", "two"]), ("cost", 1.5)]
+    for size in (1, 2, 7, len(text)):
+        _, pieces = _feed_in_pieces(text, size)
+        assert [field for piece in pieces for field in piece] == expected
+
+
+def test_text_after_the_object_is_ignored():
+    scanner = FieldScanner()
+    assert scanner.feed('{"a": 1} {"b": 2}') == [("a", 1)]
+    assert scanner.feed(', "c": 3}') == []
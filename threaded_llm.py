@@ -0,0 +1,48 @@
+import asyncio
+import contextvars
+import functools
+from langchain_core.runnables import Runnable
+
+_DONE = object()
+
+
+class ThreadedLLM(Runnable):
+    """Runs a chat model's async calls on its sync client in a dedicated thread pool.
+
+    Over REST the SDK has no usable async client. langchain's fallback would
+    borrow the event loop's default executor (cpu_count + 4 threads), capping
+    concurrent Gemini calls and competing with everything else run there.
+    """
+
+    def __init__(self, llm, executor):
+        self.llm = llm
+        self.executor = executor
+
+    @property
+    def model(self):
+        return getattr(self.llm, "model", None)
+
+    def _run(self, context, fn, *args, **kwargs):
+        return asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(context.run, fn, *args, **kwargs)
+        )
+
+    def invoke(self, input, config=None, **kwargs):
+        return self.llm.invoke(input, config, **kwargs)
+
+    def stream(self, input, config=None, **kwargs):
+        return self.llm.stream(input, config, **kwargs)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return await self._run(contextvars.copy_context(), self.llm.invoke, input, config, **kwargs)
+
+    async def astream(self, input, config=None, **kwargs):
+        # One context for the whole stream, so the generator sees the same
+        # context variables (the analyzer label, langchain's run) on every step.
+        context = contextvars.copy_context()
+        chunks = self.llm.stream(input, config, **kwargs)
+        while True:
+            chunk = await self._run(context, next, chunks, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk